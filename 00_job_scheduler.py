@@ -0,0 +1,172 @@
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# One scheduler per server process. Instructor pages hand it a batch as a
+# list of fixed-size chunks; a bounded pool of workers runs them, taking one
+# chunk from each waiting session in turn, so a huge race from one class
+# can't starve everyone else.
+
+WORKERS = max(1, min(4, os.cpu_count() or 1))
+THROUGHPUT_WINDOW = 60.0  # seconds of finished chunks averaged for the trials/s figure
+
+class Job:
+    """One batch request: its chunks, their results and progress."""
+
+    def __init__(self, job_id, session, label, tasks, units):
+        self.id = job_id
+        self.session = session
+        self.label = label
+        self.pending = deque(enumerate(tasks))
+        self.results = [None] * len(tasks)
+        self.units = units
+        self.total = len(tasks)
+        self.done = 0
+        self.error = None
+        self.cancelled = False
+        self.submitted = time.time()
+        self.finished_at = None
+        self.finished = threading.Event()
+
+    @property
+    def status(self):
+        if self.error is not None:
+            return "failed"
+        if self.cancelled:
+            return "cancelled"
+        if self.finished.is_set():
+            return "done"
+        return "running" if self.done or len(self.pending) < self.total else "queued"
+
+class Scheduler:
+    def __init__(self, workers=WORKERS):
+        self.workers = workers
+        self._cond = threading.Condition()
+        self._queues = OrderedDict()   # session -> deque of jobs with chunks left to hand out
+        self._active = {}              # job id -> job not yet finished
+        self._recent = deque(maxlen=10)
+        self._completed = deque()      # (finish time, trials) per chunk, for throughput
+        self._ids = itertools.count(1)
+        for i in range(workers):
+            threading.Thread(target=self._work, name=f"sim-worker-{i}", daemon=True).start()
+
+    def submit(self, session, label, tasks, units=None):
+        """Queues a job of zero-argument callables; units[i] is the number of trials chunk i covers."""
+        with self._cond:
+            job = Job(next(self._ids), session, label, list(tasks), units or [1] * len(tasks))
+            if not job.total:
+                job.finished_at = time.time()
+                job.finished.set()
+                return job
+            self._active[job.id] = job
+            self._queues.setdefault(session, deque()).append(job)
+            self._cond.notify_all()
+            return job
+
+    def cancel(self, job):
+        """Drops a job's chunks that haven't started; chunks already running finish and are ignored."""
+        with self._cond:
+            if not job.finished.is_set():
+                job.cancelled = True
+                self._finish(job)
+
+    def _finish(self, job):
+        job.pending.clear()
+        queue = self._queues.get(job.session)
+        if queue is not None and job in queue:
+            queue.remove(job)
+            if not queue:
+                del self._queues[job.session]
+        self._active.pop(job.id, None)
+        self._recent.append(job)
+        job.finished_at = time.time()
+        job.finished.set()
+
+    def _next_chunk(self):
+        # Round robin: take one chunk from the oldest job of the session at the
+        # front, then send that session to the back of the line.
+        with self._cond:
+            while not self._queues:
+                self._cond.wait()
+            session, queue = next(iter(self._queues.items()))
+            job = queue[0]
+            index, task = job.pending.popleft()
+            if not job.pending:
+                queue.popleft()
+            del self._queues[session]
+            if queue:
+                self._queues[session] = queue
+            return job, index, task
+
+    def _work(self):
+        while True:
+            job, index, task = self._next_chunk()
+            try:
+                result, error = task(), None
+            except Exception as e:
+                result, error = None, e
+            with self._cond:
+                if job.finished.is_set():
+                    continue
+                now = time.time()
+                if error is not None:
+                    job.error = error
+                    self._finish(job)
+                    continue
+                job.results[index] = result
+                job.done += 1
+                self._completed.append((now, job.units[index]))
+                if job.done == job.total:
+                    self._finish(job)
+
+    def stats(self):
+        """Queue depth, per-job progress and recent throughput, for the instructor UI."""
+        with self._cond:
+            now = time.time()
+            while self._completed and self._completed[0][0] < now - THROUGHPUT_WINDOW:
+                self._completed.popleft()
+            jobs = list(self._active.values()) + list(reversed(self._recent))
+            return {
+                "workers": self.workers,
+                "queue_depth": sum(len(j.pending) for q in self._queues.values() for j in q),
+                "sessions_waiting": len(self._queues),
+                "trials_per_s": sum(u for _, u in self._completed) / THROUGHPUT_WINDOW,
+                "jobs": [{"Job": j.id, "Session": j.session[:8], "Batch": j.label, "Status": j.status,
+                          "Progress": f"{j.done}/{j.total}",
+                          "Seconds": round((j.finished_at or now) - j.submitted, 2)} for j in jobs],
+            }
+
+@st.cache_resource
+def scheduler():
+    return Scheduler()
+
+def _session_id():
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else "no-session"
+
+def run_job(label, tasks, units=None):
+    """
+    Runs a batch on the shared scheduler from a page and returns the chunk
+    results in order, showing a progress bar while this session waits. If the
+    page is interrupted (a click, a closed tab) the rest of the job is dropped.
+    """
+    sched = scheduler()
+    job = sched.submit(_session_id(), label, tasks, units)
+    bar = st.progress(0.0, text=f"⏳ {label}: queued")
+    try:
+        while not job.finished.wait(0.2):
+            bar.progress(job.done / job.total, text=f"⏳ {label}: {job.done}/{job.total} chunks "
+                                                    f"({sched.stats()['queue_depth']} queued on the server)")
+    finally:
+        sched.cancel(job)
+    bar.empty()
+    if job.error is not None:
+        raise job.error
+    return job.results
+
+# --- END OF SCHEDULER FILE ---
@@ -0,0 +1,62 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import streamlit as st
+
+# Batch results shared by every session in this server process, so a second
+# section replaying the same race (same seed) gets its numbers back instantly.
+# Keys are (strategy, scenario, seed, trials) tuples built by the pages;
+# values must never be mutated by the caller.
+
+CAPACITY = 512
+
+@st.cache_resource
+def _store():
+    return {"lock": threading.Lock(), "entries": OrderedDict(), "hits": 0, "misses": 0}
+
+def batch_seed(race_seed, batch_index):
+    """Seed for the batch_index-th batch of a race; the same race always replays the same batches."""
+    return int(np.random.SeedSequence([int(race_seed), int(batch_index)]).generate_state(1)[0])
+
+def group_strategies(keys):
+    """Maps each distinct strategy key to the positions that registered it, in first-seen order."""
+    groups = {}
+    for i, key in enumerate(keys):
+        groups.setdefault(key, []).append(i)
+    return groups
+
+def lookup(key):
+    """Returns the cached result for key (marking it recently used), or None."""
+    store = _store()
+    with store["lock"]:
+        if key in store["entries"]:
+            store["entries"].move_to_end(key)
+            store["hits"] += 1
+            return store["entries"][key]
+        store["misses"] += 1
+        return None
+
+def store_result(key, value):
+    store = _store()
+    with store["lock"]:
+        store["entries"][key] = value
+        store["entries"].move_to_end(key)
+        while len(store["entries"]) > CAPACITY:
+            store["entries"].popitem(last=False)
+
+def cached(key, compute):
+    """Returns compute() memoized under key. Concurrent misses may both compute; the results are identical."""
+    value = lookup(key)
+    if value is None:
+        value = compute()
+        store_result(key, value)
+    return value
+
+def cache_stats():
+    store = _store()
+    with store["lock"]:
+        return {"hits": store["hits"], "misses": store["misses"],
+                "size": len(store["entries"]), "capacity": CAPACITY}
+
+# --- END OF CACHE FILE ---
@@ -0,0 +1,30 @@
+import threading
+import time
+
+import streamlit as st
+
+# The race seed the instructor has published, shared by every session in this
+# server process. cache_resource hands all pages the same object.
+
+@st.cache_resource
+def _registry():
+    return {"lock": threading.Lock(), "race": None}
+
+def publish_race(seed, version):
+    """Makes (seed, version) the market every following student session plays."""
+    reg = _registry()
+    with reg["lock"]:
+        reg["race"] = {"seed": int(seed), "version": int(version), "published_at": time.time()}
+
+def clear_race():
+    reg = _registry()
+    with reg["lock"]:
+        reg["race"] = None
+
+def current_race():
+    """Returns the published race as a dict with seed/version/published_at, or None."""
+    reg = _registry()
+    with reg["lock"]:
+        return dict(reg["race"]) if reg["race"] else None
+
+# --- END OF REGISTRY FILE ---
@@ -0,0 +1,139 @@
+import html
+import json
+
+# Shared look & feel for both reveal animations. Everything below runs in the
+# browser: the market is shipped once and no reruns happen while it plays.
+_STYLE = """
+<style>
+  body { font-family: sans-serif; margin: 0; }
+  .ap-metrics { display: flex; gap: 48px; margin-bottom: 12px; }
+  .ap-label { font-size: 0.85rem; color: #666; }
+  .ap-value { font-size: 2rem; }
+  table { border-collapse: collapse; width: 100%; font-size: 0.9rem; }
+  th, td { border-bottom: 1px solid #e6e9ef; padding: 6px 10px; text-align: left; }
+  th { color: #666; font-weight: normal; }
+  .ap-verdict { margin-top: 12px; padding: 10px 14px; border-radius: 6px; display: none; }
+  .ap-win { background: #e6f4ea; color: #1e7b34; }
+  .ap-loss { background: #fdecea; color: #b3261e; }
+</style>
+"""
+
+_CONSOLE_SCRIPT = """
+<script>
+const D = %s;
+let step = 0;
+function status(s) {
+  const n = s.n;
+  if (step >= s.loc) return `✅ BOOKED (Loc: #${s.loc}, Val: ${s.val}, Rank: ${D.size + 1 - s.val})`;
+  if (step <= n) return `🔍 Researching (Target: ${step > 0 ? Math.max(...D.market.slice(0, step)) : 0})`;
+  if (s.search) return `👀 Searching (${s.search})`;
+  return `👀 Searching (Target: >${n > 0 ? Math.max(...D.market.slice(0, n)) : 0})`;
+}
+function tick() {
+  step += 1;
+  document.getElementById("ap-step").textContent = "#" + step;
+  document.getElementById("ap-val").textContent = D.market[step - 1];
+  document.getElementById("ap-rows").innerHTML = D.students.map(
+    s => `<tr><td>${s.label}</td><td>${status(s)}</td></tr>`).join("");
+  const done = D.students.every(s => step >= s.loc);
+  if (step < D.size && !done) setTimeout(tick, D.speed);
+}
+tick();
+</script>
+"""
+
+_LAB_SCRIPT = """
+<script>
+const D = %s;
+let step = 0, bench = 0;
+function tick() {
+  const i = step, val = D.market[i];
+  step += 1;
+  let note = "";
+  if (i < D.n_look) {
+    if (val > bench) bench = val;
+  } else if (step === D.loc) {
+    note = "🎯 PICKED";
+  }
+  const phase = i < D.n_look ? "LOOK" : "SEARCH";
+  const rows = document.getElementById("ap-rows");
+  rows.insertAdjacentHTML("afterbegin",
+    `<tr><td>${step}</td><td>${val}</td><td>${phase}</td><td>${note}</td></tr>`);
+  document.getElementById("ap-phase").textContent =
+    step < D.n_look ? `LOOKING (Venue ${step + 1} of ${D.n_look})`
+                    : (D.search ? `SEARCHING (${D.search})` : `SEARCHING (Must beat ${bench})`);
+  if (step < D.loc) { setTimeout(tick, D.speed); return; }
+  const v = document.getElementById("ap-verdict");
+  if (D.val === D.size) {
+    v.className = "ap-verdict ap-win";
+    v.textContent = `Perfect! You found the Rank ${D.size} venue.`;
+  } else if (D.best_pos <= D.n_look) {
+    v.className = "ap-verdict ap-loss";
+    v.textContent = `The Rank ${D.size} venue was at Position #${D.best_pos}—inside your Look Group! You never had a chance to pick it.`;
+  } else {
+    v.className = "ap-verdict ap-loss";
+    v.textContent = `The Rank ${D.size} venue was at Position #${D.best_pos}. You settled for Rank ${D.val} at Position #${D.loc}.`;
+  }
+  v.style.display = "block";
+}
+tick();
+</script>
+"""
+
+def _embed(payload):
+    """Serializes the payload so it can't close the surrounding script tag."""
+    return json.dumps(payload).replace("</", "<\\/")
+
+def console_autoplay_html(market, students, picks, speed_ms=150):
+    """
+    Builds the instructor's Manual Reveal as a client-side animation.
+    students is a list of (label, look length, search label or None for a
+    plain cutoff); picks are the matching (position, value) outcomes already
+    resolved on the server.
+    """
+    payload = {
+        "market": [int(v) for v in market],
+        "size": len(market),
+        "speed": int(speed_ms),
+        "students": [
+            {"label": html.escape(str(label)), "n": int(n), "search": search and html.escape(search),
+             "loc": int(loc), "val": int(val)}
+            for (label, n, search), (loc, val) in zip(students, picks)
+        ],
+    }
+    return (
+        _STYLE
+        + """
+<div class="ap-metrics">
+  <div><div class="ap-label">Current Venue</div><div class="ap-value" id="ap-step"></div></div>
+  <div><div class="ap-label">Venue Value</div><div class="ap-value" id="ap-val"></div></div>
+</div>
+<table><thead><tr><th>Student</th><th>Status</th></tr></thead><tbody id="ap-rows"></tbody></table>
+"""
+        + _CONSOLE_SCRIPT % _embed(payload)
+    )
+
+def lab_autoplay_html(market, n_look, pick, speed_ms=150, search=None):
+    """Builds the student lab's activity log as a client-side animation ending at the pick."""
+    loc, val = pick
+    payload = {
+        "search": search,
+        "market": [int(v) for v in market],
+        "size": len(market),
+        "speed": int(speed_ms),
+        "n_look": int(n_look),
+        "loc": int(loc),
+        "val": int(val),
+        "best_pos": int(list(market).index(len(market))) + 1,
+    }
+    return (
+        _STYLE
+        + """
+<div class="ap-label">PHASE: <span id="ap-phase"></span></div>
+<div class="ap-verdict" id="ap-verdict"></div>
+<table><thead><tr><th>Venue</th><th>Rank</th><th>Phase</th><th>Note</th></tr></thead><tbody id="ap-rows"></tbody></table>
+"""
+        + _LAB_SCRIPT % _embed(payload)
+    )
+
+# --- END OF AUTOPLAY FILE ---
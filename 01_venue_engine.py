@@ -0,0 +1,335 @@
+import numpy as np
+
+N_VENUES = 100
+
+# Markets are stored as (seed, generator version) and rebuilt on demand.
+# Bump the version if market_from_seed ever changes how it shuffles, so old
+# race seeds keep replaying the exact market they were published with.
+MARKET_VERSION = 1
+MAX_SEED = 1_000_000
+
+def new_seed():
+    """Draws a short race seed that is easy to read out loud to a class."""
+    return int(np.random.randint(0, MAX_SEED))
+
+def market_from_seed(seed, version=MARKET_VERSION, n_venues=N_VENUES):
+    """Rebuilds the venue ranks 1..n in the reveal order encoded by the seed."""
+    if version != 1:
+        raise ValueError(f"Unknown market generator version: {version}")
+    return np.random.default_rng(int(seed)).permutation(np.arange(1, n_venues + 1))
+
+def market_batch(seed, trials, n_venues=N_VENUES):
+    """Builds a (trials, n_venues) block of independent markets in one shot."""
+    dtype = np.uint8 if n_venues < 256 else np.uint16
+    rng = np.random.default_rng(int(seed))
+    return rng.permuted(np.tile(np.arange(1, n_venues + 1, dtype=dtype), (trials, 1)), axis=1)
+
+# --- VARIANTS ---
+# Each variant changes how a batch of markets is drawn, what counts as a win,
+# or what happens when a rule never fires; the rules themselves don't change.
+#   classic        n venues ranked 1..n, win by booking the best
+#   unknown_pool   the number of venues is drawn from pool_min..pool_max and never shown
+#   top_k          booking any of the k best venues counts as a win
+#   cardinal       venues carry independent uniform scores in [0, 100); payoff is the score
+#   recall         a rule that never fires may go back for the best venue it passed,
+#                  which is still free with probability recall_prob
+# Payoffs are on a 0-100 scale: the score booked for cardinal markets, and
+# 100 * rank / pool size otherwise (100 = the best venue).
+
+VARIANTS = {
+    "classic": "Classic",
+    "unknown_pool": "Unknown Pool Size",
+    "top_k": "Best of Top-k",
+    "cardinal": "Cardinal Scores",
+    "recall": "Recall One Passed Venue",
+}
+VARIANT_DEFAULTS = {"n_venues": N_VENUES, "pool_min": 50, "pool_max": 150, "top_k": 5, "recall_prob": 0.5}
+
+def make_variant(kind="classic", **params):
+    """Builds a variant dict, filling in defaults for any parameter not given."""
+    if kind not in VARIANTS:
+        raise ValueError(f"Unknown variant: {kind}")
+    return {"kind": kind, **VARIANT_DEFAULTS, **params}
+
+def describe_variant(variant):
+    """Short label for a variant and the parameters it uses."""
+    kind = variant["kind"]
+    if kind == "unknown_pool":
+        return f"{VARIANTS[kind]} ({variant['pool_min']}-{variant['pool_max']} venues)"
+    if kind == "top_k":
+        return f"{VARIANTS[kind]} (k={variant['top_k']}, {variant['n_venues']} venues)"
+    if kind == "recall":
+        return f"{VARIANTS[kind]} ({variant['recall_prob']:.0%} still free, {variant['n_venues']} venues)"
+    return f"{VARIANTS[kind]} ({variant['n_venues']} venues)"
+
+def pool_range(variant):
+    """Smallest and largest number of venues a market in this variant can have."""
+    if variant["kind"] == "unknown_pool":
+        return variant["pool_min"], variant["pool_max"]
+    return variant["n_venues"], variant["n_venues"]
+
+def _unknown_pool_batch(rng, trials, pool_min, pool_max):
+    """
+    Markets of different sizes in one padded block: row j holds ranks
+    1..lengths[j] in random order, followed by zeros no rule can book.
+    """
+    lengths = rng.integers(pool_min, pool_max + 1, size=trials)
+    keys = rng.random((trials, pool_max))
+    keys[np.arange(pool_max)[None, :] >= lengths[:, None]] = -1.0
+    # Padding sorts first, so a real venue's rank is its position in the sort minus the padding.
+    order = keys.argsort(axis=1).argsort(axis=1)
+    values = np.maximum(order - (pool_max - lengths)[:, None] + 1, 0)
+    return values.astype(np.uint8 if pool_max < 256 else np.uint16), lengths
+
+def variant_batch(variant, seed, trials):
+    """
+    Draws one batch of markets for a variant. Returns (markets, lengths,
+    fallback): the real pool size of every market and the 0-based venue
+    booked there if a rule never fires.
+    """
+    kind, n = variant["kind"], variant["n_venues"]
+    rng = np.random.default_rng(int(seed))
+    if kind == "unknown_pool":
+        markets, lengths = _unknown_pool_batch(rng, trials, variant["pool_min"], variant["pool_max"])
+    elif kind == "cardinal":
+        markets, lengths = (rng.random((trials, n), dtype=np.float32) * 100), np.full(trials, n)
+    else:
+        markets, lengths = market_batch(rng.integers(2**63), trials, n), np.full(trials, n)
+    fallback = lengths - 1
+    if kind == "recall":
+        # Everything was passed by the time a rule runs out, so the best passed venue is the best overall.
+        fallback = np.where(rng.random(trials) < variant["recall_prob"], markets.argmax(axis=1), fallback)
+    return markets, lengths, fallback
+
+# --- STOPPING RULES ---
+# A rule is a small dict; students write them as text:
+#   cutoff:N                 look at N venues, then take the first that beats all of them
+#   threshold:T[:N]          after N venues, take the first one scoring T or better
+#   rank:N:R                 after N venues, take the first one in the top R seen so far
+#   record:N:K               after N venues, take the K-th new best-so-far
+#   phases:N1/R1,N2/R2,...   from venue N1 accept the top R1 seen so far, from N2 the top R2, ...
+# Every rule falls back to the last venue if it never fires (see the recall variant below).
+
+RULE_HELP = "cutoff:N | threshold:T[:N] | rank:N:R | record:N:K | phases:N1/R1,N2/R2"
+
+def cutoff_rule(n):
+    return {"kind": "cutoff", "n": int(n)}
+
+def parse_rule(text, n_venues=N_VENUES):
+    """
+    Turns a rule string like 'rank:30:2' into a rule dict. Raises ValueError on
+    bad input, including a look length that leaves no venue to book out of
+    n_venues, a phase that starts past the last venue, or a top-R wider than
+    the market.
+    """
+    text = str(text).strip().lower()
+    kind, _, rest = text.partition(":")
+    args = [a for a in rest.split(":") if a != ""]
+    rule = None
+    try:
+        if kind == "cutoff" and len(args) == 1:
+            rule = cutoff_rule(float(args[0]))
+        elif kind == "threshold" and len(args) in (1, 2):
+            rule = {"kind": "threshold", "value": int(args[0]), "n": int(args[1]) if len(args) == 2 else 0}
+        elif kind == "rank" and len(args) == 2:
+            rule = {"kind": "rank", "n": int(args[0]), "top": max(1, int(args[1]))}
+        elif kind == "record" and len(args) == 2:
+            rule = {"kind": "record", "n": int(args[0]), "k": max(1, int(args[1]))}
+        elif kind == "phases" and len(args) == 1:
+            phases = sorted((int(a), max(1, int(b))) for a, b in (p.split("/") for p in args[0].split(",")))
+            rule = {"kind": "phases", "phases": phases}
+    except ValueError:
+        pass
+    if rule is not None:
+        if rule["kind"] == "phases":
+            if all(1 <= a <= n_venues and b <= n_venues for a, b in rule["phases"]):
+                return rule
+        elif 0 <= rule["n"] < n_venues and rule.get("top", 1) <= n_venues:
+            return rule
+    raise ValueError(f"Can't read rule '{text}' (look lengths run 0-{n_venues - 1}, "
+                     f"phase starts and top-R 1-{n_venues}). Use one of: {RULE_HELP}")
+
+def describe_rule(rule):
+    """Short label for a rule, in the same text format parse_rule reads."""
+    kind = rule["kind"]
+    if kind == "cutoff":
+        return f"cutoff:{rule['n']}"
+    if kind == "threshold":
+        return f"threshold:{rule['value']}:{rule['n']}"
+    if kind == "rank":
+        return f"rank:{rule['n']}:{rule['top']}"
+    if kind == "record":
+        return f"record:{rule['n']}:{rule['k']}"
+    return "phases:" + ",".join(f"{a}/{b}" for a, b in rule["phases"])
+
+def look_length(rule):
+    """Number of opening venues the rule can never pick."""
+    return rule["phases"][0][0] - 1 if rule["kind"] == "phases" else rule["n"]
+
+def _depth(rule, n):
+    """How many of the best venues-so-far the rule needs to track (never more than the n venues in a market)."""
+    if rule["kind"] == "rank":
+        return min(rule["top"], n)
+    if rule["kind"] == "phases":
+        return min(max(r for _, r in rule["phases"]), n)
+    return 1
+
+def prefix_stats(markets, depth):
+    """
+    best_before[r - 1][:, i] is the r-th best value among venues 0..i-1 (0 if
+    fewer than r have been seen). One pass over the columns, vectorized across
+    every market in the batch.
+    """
+    trials, n = markets.shape
+    best_before = np.zeros((depth, trials, n), dtype=markets.dtype)
+    top = np.zeros((depth, trials), dtype=markets.dtype)
+    for i in range(n):
+        best_before[:, :, i] = top
+        new = markets[:, i].copy()
+        for r in range(depth):
+            swap = new > top[r]
+            top[r], new = np.where(swap, new, top[r]), np.where(swap, top[r], new)
+    return best_before
+
+class BatchStats:
+    """
+    Prefix statistics for one batch of markets, computed once and shared by
+    every rule scored on it.
+    """
+
+    def __init__(self, markets, depth):
+        self.markets = markets
+        self.n = markets.shape[1]
+        self.best_before = prefix_stats(markets, depth)
+        self._next = {}
+
+    def next_hit(self, key, mask_fn):
+        """
+        For a criterion that doesn't depend on the look phase, table[:, i] is the
+        first venue index >= i that meets it (n if none). Built once per batch,
+        then every rule using the criterion is a single column lookup.
+        """
+        if key not in self._next:
+            hits = np.where(mask_fn(), np.arange(self.n), self.n)
+            table = np.full((hits.shape[0], self.n + 1), self.n, dtype=np.int16)
+            table[:, :-1] = np.minimum.accumulate(hits[:, ::-1], axis=1)[:, ::-1]
+            self._next[key] = table
+        return self._next[key]
+
+    def top_mask(self, top):
+        """Venues ranked in the top `top` of everything seen up to and including them."""
+        # Any top at least as wide as the market accepts every venue
+        return self.markets > self.best_before[min(top, self.n) - 1]
+
+def compile_rule(rule):
+    """
+    Compiles a rule into pick(stats) -> 0-based index of the venue the rule
+    fires on in every market, or stats.n where it never fires.
+    """
+    kind = rule["kind"]
+
+    def first_hit_after(stats, key, mask_fn, n):
+        return stats.next_hit(key, mask_fn)[:, min(max(n, 0), stats.n)]
+
+    def first_in_mask(stats, mask):
+        return np.where(mask.any(axis=1), mask.argmax(axis=1), stats.n)
+
+    # The first venue after the look phase that beats all of it is exactly the
+    # first new best-so-far after it, so cutoffs share the rank-1 table.
+    if kind == "cutoff" or (kind == "record" and rule["k"] == 1):
+        def pick(stats):
+            return first_hit_after(stats, ("rank", 1), lambda: stats.top_mask(1), rule["n"])
+    elif kind == "rank":
+        def pick(stats):
+            return first_hit_after(stats, ("rank", rule["top"]), lambda: stats.top_mask(rule["top"]), rule["n"])
+    elif kind == "threshold":
+        def pick(stats):
+            return first_hit_after(stats, ("threshold", rule["value"]),
+                                   lambda: stats.markets >= rule["value"], rule["n"])
+    elif kind == "record":
+        def pick(stats):
+            after = np.arange(stats.n)[None, :] >= rule["n"]
+            records = after & stats.top_mask(1)
+            return first_in_mask(stats, records & (np.cumsum(records, axis=1) == rule["k"]))
+    elif kind == "phases":
+        def pick(stats):
+            allowed = np.zeros(stats.n, dtype=int)
+            for start, top in rule["phases"]:
+                allowed[np.arange(1, stats.n + 1) >= start] = top
+            mask = np.zeros(stats.markets.shape, dtype=bool)
+            for top in set(allowed[allowed > 0].tolist()):
+                mask |= (allowed == top)[None, :] & stats.top_mask(top)
+            return first_in_mask(stats, mask)
+    else:
+        raise ValueError(f"Unknown rule kind: {kind}")
+    return pick
+
+def evaluate_rules(rules, markets, lengths=None, fallback=None):
+    """
+    Runs every rule over the same batch of markets. Returns one (positions,
+    values) pair of arrays per rule; positions are 1-based. A rule that
+    doesn't fire within a market's real length books fallback (by default the
+    last real venue).
+    """
+    markets = np.atleast_2d(markets)
+    rows = np.arange(markets.shape[0])
+    lengths = np.full(rows.size, markets.shape[1]) if lengths is None else lengths
+    fallback = lengths - 1 if fallback is None else fallback
+    stats = BatchStats(markets, max([_depth(r, markets.shape[1]) for r in rules], default=1))
+    out = []
+    for rule in rules:
+        idx = compile_rule(rule)(stats)
+        idx = np.where(idx < lengths, idx, fallback)
+        out.append((idx + 1, markets[rows, idx]))
+    return out
+
+def chunk_plan(seed, trials, chunk=20_000):
+    """
+    Splits a batch into (chunk seed, size) pieces so a million markets never
+    sit in memory at once. Scoring the pieces in any order, on any thread,
+    gives the same result as score_rules.
+    """
+    plan, done = [], 0
+    for child in np.random.SeedSequence(int(seed)).spawn(-(-trials // chunk)):
+        size = min(chunk, trials - done)
+        plan.append((int(child.generate_state(1)[0]), size))
+        done += size
+    return plan
+
+def score_chunk(rules, seed, size, variant=None):
+    """Scores every rule on one chunk of markets. Returns (wins, payoff sums) arrays, one entry per rule."""
+    variant = variant or make_variant()
+    wins = np.zeros(len(rules), dtype=np.int64)
+    payoff_sum = np.zeros(len(rules))
+    markets, lengths, fallback = variant_batch(variant, seed, size)
+    best = markets.max(axis=1).astype(np.float64)
+    if variant["kind"] == "top_k":
+        best = best - (variant["top_k"] - 1)
+    for j, (_, values) in enumerate(evaluate_rules(rules, markets, lengths, fallback)):
+        wins[j] = int(np.sum(values >= best))
+        if variant["kind"] == "cardinal":
+            payoff_sum[j] = float(np.sum(values, dtype=np.float64))
+        else:
+            payoff_sum[j] = float(np.sum(100.0 * values / lengths))
+    return wins, payoff_sum
+
+def merge_scores(parts, trials):
+    """Adds up score_chunk results into one dict per rule with the win count, win rate and mean payoff."""
+    wins = np.sum([w for w, _ in parts], axis=0)
+    payoff_sum = np.sum([v for _, v in parts], axis=0)
+    n = max(trials, 1)
+    return [{"wins": int(w), "trials": trials, "win_rate": w / n, "mean_payoff": v / n}
+            for w, v in zip(wins, payoff_sum)]
+
+def score_rules(rules, trials, seed, chunk=20_000, variant=None):
+    """
+    Scores every rule on the same `trials` markets of a variant (classic by
+    default). Returns one dict per rule with the win count, win rate and mean payoff.
+    """
+    return merge_scores([score_chunk(rules, s, size, variant) for s, size in chunk_plan(seed, trials, chunk)], trials)
+
+def resolve_rules(market, rules):
+    """Resolves every rule in the class against the same single market."""
+    return [(int(pos[0]), int(val[0])) for pos, val in evaluate_rules(rules, np.asarray(market)[None, :])]
+
+# --- END OF ENGINE FILE ---
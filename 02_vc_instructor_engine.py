@@ -21,6 +21,68 @@ def run_competition_sim(f, p, b, n_steps=50):
             
     return float(current_w)
 
+def _log_steps(f, b):
+    """Log growth of a winning and of a losing deal at bet size f (a loss at f = 1 is -inf)."""
+    up = float(np.log1p(f * b))
+    down = float(np.log1p(-f)) if f < 1 else -np.inf
+    return up, down
+
+def final_log_wealth(wins, f, b, start=100.0):
+    """
+    Final log-wealth for rows of deal outcomes, from the running win count
+    rather than a running product, so it stays exact at any horizon. Wealth
+    before deal k is start * (1+fb)^W * (1-f)^(k-W), so a fund is insolvent
+    exactly when its win count W is at or under a fixed threshold at some k;
+    insolvent funds finish at -inf.
+    """
+    n_steps = wins.shape[1]
+    w = np.zeros((wins.shape[0], n_steps + 1), dtype=np.int32)
+    np.cumsum(wins, axis=1, out=w[:, 1:])
+    k = np.arange(n_steps)
+    log0 = np.log(start)
+    up, down = _log_steps(f, b)
+    final_w = w[:, -1]
+    with np.errstate(invalid="ignore"):
+        final = log0 + final_w * up + np.where(final_w < n_steps, (n_steps - final_w) * down, 0.0)
+    if down == -np.inf:
+        broke = np.any(w[:, :-1] < k, axis=1)
+    elif up > down:
+        broke = np.any(w[:, :-1] <= (-log0 - k * down) / (up - down), axis=1)
+    else:
+        broke = np.zeros(wins.shape[0], dtype=bool)
+    return np.where(broke, -np.inf, final)
+
+def median_log_wealth(logs):
+    """
+    Log of the median fund, from log-wealth values. For an even count the
+    median is the average of the two middle funds, taken in log space so a
+    wiped-out fund (-inf) halves its partner rather than zeroing it.
+    """
+    logs = np.sort(np.asarray(logs, dtype=np.float64))
+    mid = logs.size // 2
+    if logs.size % 2:
+        return float(logs[mid])
+    return float(np.logaddexp(logs[mid - 1], logs[mid]) - np.log(2))
+
+def run_competition_batch(f, p, b, n_trials, n_steps=50, seed=None, log_wealth=False, dtype=np.float64):
+    """
+    Runs n_trials careers of run_competition_sim at once and returns their
+    final wealth. The same seed always reproduces the same careers. With
+    log_wealth=True it returns natural-log wealth instead (-inf = insolvent),
+    which never overflows; dtype=np.float32 halves the result buffer.
+    """
+    rng = np.random.default_rng(seed)
+    wins = rng.random((n_trials, n_steps)) < p
+    if log_wealth:
+        return final_log_wealth(wins, f, b).astype(dtype)
+    paths = np.empty((n_trials, n_steps + 1))
+    paths[:, 0] = 100.0
+    np.cumprod(np.where(wins, 1.0 + f * b, 1.0 - f), axis=1, out=paths[:, 1:])
+    paths[:, 1:] *= 100.0
+    # Insolvency is checked before each deal, so only wealth ahead of a deal can end a career
+    broke = np.any(paths[:, :-1] <= 1.0, axis=1)
+    return np.where(broke, 0.0, paths[:, -1]).astype(dtype)
+
 # --- SAFETY PADDING ---
 # Ensure no truncation occurs
 # --- END OF FILE ---
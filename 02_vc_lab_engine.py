@@ -1,8 +1,7 @@
 import numpy as np
 
-def run_audit(mkt, sec, p_true):
+def run_audit(mkt, sec, p_true, n=200):
     """Generates counts using keys 'n', 'ef', and 'mf' for the memo."""
-    n = 200
     # Add minor noise so every audit feels unique
     expected_p = p_true + np.random.normal(0, 0.01)
     success_count = int(n * np.clip(expected_p, 0.05, 0.95))
@@ -25,17 +24,72 @@ def run_audit(mkt, sec, p_true):
 def simulate_career(p_val, n_deals=100):
     """Simulates a deal sequence for Stage 2 visualization."""
     raw = np.random.random(n_deals) < p_val
-    max_streak, current_streak = 0, 0
-    for outcome in raw:
-        if not outcome:
-            current_streak += 1
-            max_streak = max(max_streak, current_streak)
-        else:
-            current_streak = 0
-    return {"Wins": int(np.sum(raw)), "Max_Streak": max_streak, "raw": raw.tolist()}
+    return {"Wins": int(np.sum(raw)), "Max_Streak": int(max_fail_streaks(raw[None, :])[0]), "raw": raw.tolist()}
+
+def simulate_careers(p_val, n_careers, n_deals=100):
+    """Simulates many deal sequences at once: a (n_careers, n_deals) bool array, True = win."""
+    return np.random.random((n_careers, n_deals)) < p_val
+
+def max_fail_streaks(raw):
+    """Longest run of consecutive failures in each row, one pass over the deals for all careers."""
+    current = np.zeros(raw.shape[0], dtype=np.int32)
+    longest = np.zeros(raw.shape[0], dtype=np.int32)
+    for outcome in raw.T:
+        current = np.where(outcome, 0, current + 1)
+        np.maximum(longest, current, out=longest)
+    return longest
+
+# --- CAREER LOG ---
+# Stage 2 keeps running histograms over every simulated career plus the
+# latest career as packed bits (100 deals = 13 bytes), which is all the page
+# shows; the log stays the same size however many careers are run.
+
+def new_career_log(n_deals=100):
+    return {
+        "n_deals": n_deals,
+        "count": 0,
+        "last": np.zeros((n_deals + 7) // 8, dtype=np.uint8),   # packed outcomes of the latest career
+        "win_hist": np.zeros(n_deals + 1, dtype=np.int64),     # careers with exactly k wins
+        "streak_hist": np.zeros(n_deals + 1, dtype=np.int64),  # careers whose longest losing run is k
+    }
+
+def record_careers(log, raw):
+    """Adds careers (rows of a bool array) to the log's running aggregates and keeps the last one."""
+    raw = np.atleast_2d(raw)
+    wins = raw.sum(axis=1)
+    streaks = max_fail_streaks(raw)
+    log["last"] = np.packbits(raw[-1])
+    log["win_hist"] += np.bincount(wins, minlength=log["n_deals"] + 1)
+    log["streak_hist"] += np.bincount(streaks, minlength=log["n_deals"] + 1)
+    log["count"] += raw.shape[0]
+
+def career_outcomes(log):
+    """Unpacks the latest logged career back into a bool array."""
+    return np.unpackbits(log["last"], count=log["n_deals"]).astype(bool)
+
+def hist_percentile(hist, q):
+    """Value at percentile q (0-100) of the careers counted in a histogram."""
+    cum = np.cumsum(hist)
+    return int(np.searchsorted(cum, q / 100 * cum[-1]))
+
+def run_simulation(f, p, b, n_steps=50, log_wealth=False):
+    """
+    Runs a SINGLE wealth simulation path. With log_wealth=True the path is
+    natural-log wealth, built from the running win count so it never
+    overflows; it drops to -inf for good once the fund is insolvent.
+    """
+    if log_wealth:
+        wins = np.concatenate([[0], np.cumsum(np.random.random(n_steps) < p)])
+        losses = np.arange(n_steps + 1) - wins
+        down = np.log1p(-f) if f < 1 else -np.inf
+        with np.errstate(invalid="ignore"):
+            path = np.log(100.0) + wins * np.log1p(f * b) + np.where(losses > 0, losses * down, 0.0)
+        # Insolvency is checked before each deal, so the floor wipes out every later step
+        hit = np.flatnonzero(path[:-1] <= 0.0)
+        if hit.size:
+            path[hit[0] + 1:] = -np.inf
+        return path
 
-def run_simulation(f, p, b, n_steps=50):
-    """Runs a SINGLE wealth simulation path."""
     path = [100.0]
     for t in range(n_steps):
         current_w = path[-1]
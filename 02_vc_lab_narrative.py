@@ -1,28 +1,54 @@
 # 02_vc_lab_narrative.py
 
-MARKET_STORIES = {
-    "Market A: The Boom": "Capital is plentiful and exit multiples are at record highs.",
-    "Market B: The Squeeze": "Liquidity is tightening. Only the most efficient reach exit.",
-    "Market C: Rule Change": "New regulations have created niche uncertainty."
-}
-
-TYPE_STORY = {
-    "Type 1: The Basics": "Proven business models with steady growth.",
-    "Type 2: Tech Apps": "High-growth software ventures. Scalable but sensitive.",
-    "Type 3: Big Science": "High-cap-ex, long timelines with binary outcomes."
-}
-
-P_MATRIX = {
-    "Market A: The Boom": {"Type 1: The Basics": 0.85, "Type 2: Tech Apps": 0.60, "Type 3: Big Science": 0.35},
-    "Market B: The Squeeze": {"Type 1: The Basics": 0.70, "Type 2: Tech Apps": 0.40, "Type 3: Big Science": 0.15},
-    "Market C: Rule Change": {"Type 1: The Basics": 0.75, "Type 2: Tech Apps": 0.50, "Type 3: Big Science": 0.25}
-}
-
-B_VALS = {
-    "Type 1: The Basics": 0.5,
-    "Type 2: Tech Apps": 2.0,
-    "Type 3: Big Science": 8.0
-}
+import json
+import os
+from pathlib import Path
+
+import streamlit as st
+
+# Markets, sectors and horizons live in 02_vc_scenarios.json, so adding a
+# scenario or changing a horizon is a data edit. The file is parsed once per
+# server process (again only if it changes on disk).
+SCENARIO_FILE = Path(__file__).parent / "02_vc_scenarios.json"
+
+@st.cache_resource
+def load_scenarios(path, mtime):
+    with open(path) as fh:
+        data = json.load(fh)
+    sectors, markets = data["sectors"], data["markets"]
+    for name, market in markets.items():
+        missing = set(sectors) - set(market["p"])
+        if missing:
+            raise ValueError(f"{path}: market '{name}' has no p for {sorted(missing)}")
+        bad = [sec for sec, p in market["p"].items() if not 0 < p < 1]
+        if bad:
+            raise ValueError(f"{path}: market '{name}' has p outside (0, 1) for {bad}")
+    for name, sector in sectors.items():
+        if sector["b"] <= 0:
+            raise ValueError(f"{path}: sector '{name}' needs a payback multiple b > 0")
+    horizons = data.get("horizons", {})
+    for field in ("audit_cases", "career_deals", "wealth_deals"):
+        value = horizons.get(field)
+        if not isinstance(value, int) or isinstance(value, bool) or value < 1:
+            raise ValueError(f"{path}: horizons.{field} needs a whole number of deals >= 1 (got {value!r})")
+    options = horizons.get("race_options")
+    if not isinstance(options, list) or not options or \
+            not all(isinstance(h, int) and not isinstance(h, bool) and h >= 1 for h in options):
+        raise ValueError(f"{path}: horizons.race_options needs a non-empty list of whole numbers >= 1 (got {options!r})")
+    return {
+        "MARKET_STORIES": {name: m["story"] for name, m in markets.items()},
+        "TYPE_STORY": {name: sec["story"] for name, sec in sectors.items()},
+        "P_MATRIX": {name: {sec: m["p"][sec] for sec in sectors} for name, m in markets.items()},
+        "B_VALS": {name: sec["b"] for name, sec in sectors.items()},
+        "HORIZONS": horizons,
+    }
+
+_tables = load_scenarios(str(SCENARIO_FILE), os.path.getmtime(SCENARIO_FILE))
+MARKET_STORIES = _tables["MARKET_STORIES"]
+TYPE_STORY = _tables["TYPE_STORY"]
+P_MATRIX = _tables["P_MATRIX"]
+B_VALS = _tables["B_VALS"]
+HORIZONS = _tables["HORIZONS"]
 
 MEMO_TEMPLATE = """
 ### 🛡️ INTERNAL AUDIT: RAW DATA RETRIEVAL
@@ -0,0 +1,102 @@
+import itertools
+from statistics import NormalDist
+
+import numpy as np
+
+# One-factor market model: each step, sector s succeeds when
+#   sqrt(rho) * Z_market + sqrt(1 - rho) * e_s  <  Phi^-1(p_s)
+# so every sector keeps its own p, and rho sets how much they move together.
+
+_STD_NORMAL = NormalDist()
+_phi = np.vectorize(_STD_NORMAL.cdf)
+_QUAD_NODES, _QUAD_WEIGHTS = np.polynomial.hermite_e.hermegauss(64)
+_QUAD_WEIGHTS = _QUAD_WEIGHTS / _QUAD_WEIGHTS.sum()
+
+def outcome_distribution(ps, rho=0.0):
+    """
+    Returns (patterns, probs): every win/loss combination across the sectors
+    (a 2^S x S bool array) and its exact probability under the market model.
+    Conditional on the market draw the sectors are independent, so the
+    probabilities come from a Gauss-Hermite integral over that one draw.
+    """
+    ps = np.clip(np.asarray(ps, dtype=float), 1e-9, 1 - 1e-9)
+    rho = float(np.clip(rho, 0.0, 0.99))
+    patterns = np.array(list(itertools.product([True, False], repeat=len(ps))))
+    cut = np.array([_STD_NORMAL.inv_cdf(p) for p in ps])
+    # P(win_s | Z = z) for every quadrature node z: shape (nodes, S)
+    p_cond = _phi((cut[None, :] - np.sqrt(rho) * _QUAD_NODES[:, None]) / np.sqrt(1 - rho))
+    # P(pattern | z) = prod_s (p_s(z) or 1 - p_s(z)): shape (nodes, patterns)
+    per_pattern = np.where(patterns[None, :, :], p_cond[:, None, :], 1 - p_cond[:, None, :]).prod(axis=2)
+    probs = _QUAD_WEIGHTS @ per_pattern
+    return patterns, probs / probs.sum()
+
+def step_multipliers(weights, bs, patterns):
+    """Fund multiplier for each outcome pattern: 1 + sum of w*b on wins and -w on losses."""
+    weights = np.asarray(weights, dtype=float)
+    returns = np.where(patterns, np.asarray(bs, dtype=float)[None, :], -1.0)
+    return 1.0 + returns @ weights.T
+
+def simulate_portfolios(weights, ps, bs, rho=0.0, n_funds=1000, n_steps=50, return_paths=False, seed=None,
+                        log_wealth=False, dtype=np.float64):
+    """
+    Simulates n_funds independent funds that split capital across sectors every
+    step (weights are fractions of current wealth; whatever is left stays in cash).
+    Returns final wealth per fund, or the full (n_funds, n_steps + 1) paths.
+    Funds that touch the $1 floor are insolvent and finish at 0. Pass a seed
+    to reproduce the same funds. With log_wealth=True the paths are natural-log
+    wealth (insolvent = -inf), summed instead of multiplied so they never overflow.
+    """
+    patterns, probs = outcome_distribution(ps, rho)
+    mult = step_multipliers(weights, bs, patterns)
+    rng = np.random if seed is None else np.random.default_rng(seed)
+    draws = rng.choice(len(probs), size=(n_funds, n_steps), p=probs)
+    if log_wealth:
+        with np.errstate(divide="ignore"):
+            log_mult = np.log(np.maximum(mult, 0.0))
+        paths = np.empty((n_funds, n_steps + 1))
+        paths[:, 0] = np.log(100.0)
+        np.cumsum(log_mult[draws], axis=1, out=paths[:, 1:])
+        paths[:, 1:] += paths[:, :1]
+        broke = np.logical_or.accumulate(paths <= 0.0, axis=1)
+        paths[:, 1:][broke[:, :-1]] = -np.inf
+        return (paths if return_paths else paths[:, -1]).astype(dtype)
+    paths = np.empty((n_funds, n_steps + 1))
+    paths[:, 0] = 100.0
+    np.cumprod(mult[draws], axis=1, out=paths[:, 1:])
+    paths[:, 1:] *= 100.0
+    broke = np.logical_or.accumulate(paths <= 1.0, axis=1)
+    paths[:, 1:][broke[:, :-1]] = 0.0
+    return paths if return_paths else paths[:, -1]
+
+def growth_rate(weights, ps, bs, rho=0.0):
+    """Exact expected log-growth per step for one or many allocation vectors."""
+    patterns, probs = outcome_distribution(ps, rho)
+    mult = step_multipliers(np.atleast_2d(weights), bs, patterns)
+    with np.errstate(divide="ignore"):
+        return probs @ np.log(np.maximum(mult, 0.0))
+
+def _simplex_grid(n_sectors, step, center=None, span=None, max_total=1.0):
+    """All allocation vectors on a grid with non-negative weights summing to at most max_total."""
+    if center is None:
+        axes = [np.arange(0.0, max_total + 1e-9, step)] * n_sectors
+    else:
+        axes = [np.clip(np.arange(c - span, c + span + 1e-9, step), 0.0, max_total) for c in center]
+    grid = np.array(np.meshgrid(*axes, indexing="ij")).reshape(n_sectors, -1).T
+    return np.unique(grid[grid.sum(axis=1) <= max_total + 1e-9], axis=0)
+
+def optimal_allocation(ps, bs, rho=0.0, step=0.05, refine=2, max_total=1.0):
+    """
+    Searches for the growth-optimal allocation vector: a coarse grid over the
+    simplex, then `refine` rounds of 5x finer grids around the best point.
+    Returns (weights, growth per step).
+    """
+    n = len(ps)
+    grid = _simplex_grid(n, step, max_total=max_total)
+    for _ in range(refine + 1):
+        g = growth_rate(grid, ps, bs, rho)
+        best = grid[np.argmax(g)]
+        grid = _simplex_grid(n, step / 5, center=best, span=step, max_total=max_total)
+        step /= 5
+    return best, float(np.max(g))
+
+# --- END OF ENGINE FILE ---
@@ -0,0 +1,124 @@
+import threading
+
+import numpy as np
+import streamlit as st
+
+# Exact "truth" values for a scenario, computed once per server process and
+# shared by every session. warm() fills them in on a background thread as
+# soon as a page loads the scenario tables; anything not warmed yet is
+# computed on first use.
+
+F_GRID = np.round(np.arange(101) / 100, 2)   # bet sizes the desk accepts (2 decimals)
+
+def growth_optimal_f(p, b):
+    """Kelly fraction for a single bet paying b-to-1 with success probability p."""
+    return float(np.clip((p * (b + 1) - 1) / b, 0.0, 1.0))
+
+def growth_rate(f, p, b):
+    """Expected log-growth per deal at bet size f (-inf at f = 1: one loss wipes the fund out)."""
+    if f >= 1:
+        return -np.inf
+    return float(p * np.log1p(f * b) + (1 - p) * np.log1p(-f))
+
+def ruin_curve(p, b, horizon, start=100.0):
+    """
+    Exact probability that a fund betting f every deal is worth $1 or less at
+    some point within `horizon` deals, for every f on F_GRID. Wealth after k
+    deals depends only on the win count W, so the chance of surviving is a
+    walk over W that drops the win counts at or under the floor after each deal.
+    """
+    up = np.log1p(F_GRID * b)
+    with np.errstate(divide="ignore"):
+        down = np.log1p(-F_GRID)
+    log0 = np.log(start)
+    w = np.arange(horizon + 1)
+    alive = np.zeros((F_GRID.size, horizon + 1))
+    alive[:, 0] = 1.0
+    for k in range(1, horizon + 1):
+        # Only win counts 0..k are reachable after k deals
+        alive[:, 1:k + 1] = p * alive[:, :k] + (1 - p) * alive[:, 1:k + 1]
+        alive[:, 0] *= 1 - p
+        wk = w[:k + 1]
+        with np.errstate(invalid="ignore"):
+            log_w = log0 + wk[None, :] * up[:, None] + np.where(wk < k, (k - wk) * down[:, None], 0.0)
+        alive[:, :k + 1][log_w <= 0] = 0.0
+    return 1.0 - alive.sum(axis=1)
+
+def streak_distribution(p, n_deals):
+    """
+    Exact distribution of the longest run of consecutive failures in n_deals
+    deals: entry m is P(longest losing streak == m), m = 0..n_deals.
+    """
+    q = 1 - p
+    # Row L tracks careers whose losing runs have all stayed under L, by current run length.
+    runs = np.zeros((n_deals + 2, n_deals + 1))
+    runs[:, 0] = 1.0
+    below = np.arange(n_deals + 1)[None, :] < np.arange(n_deals + 2)[:, None]
+    for _ in range(n_deals):
+        alive = runs.sum(axis=1)
+        runs[:, 1:] = q * runs[:, :-1]
+        runs[:, 0] = p * alive
+        runs[~below] = 0.0
+    cdf = runs.sum(axis=1)[1:]          # P(longest streak <= m) for m = 0..n_deals
+    return np.diff(np.concatenate([[0.0], cdf]))
+
+@st.cache_resource
+def _store():
+    return {"lock": threading.Lock(), "ruin": {}, "streak": {}, "mix": {}, "warmed": set()}
+
+def _memo(table, key, compute, store=None):
+    # Pass store from the script thread when calling from a worker: _store() needs a ScriptRunContext
+    store = store or _store()
+    with store["lock"]:
+        if key in store[table]:
+            return store[table][key]
+    value = compute()
+    with store["lock"]:
+        store[table][key] = value
+    return value
+
+def ruin_probability(p, b, horizon, f, store=None):
+    """Exact ruin probability for bet size f (rounded to the 0.01 grid)."""
+    curve = _memo("ruin", (p, b, horizon), lambda: ruin_curve(p, b, horizon), store)
+    return float(curve[int(round(float(f) * 100))])
+
+def streaks(p, n_deals, store=None):
+    return _memo("streak", (round(float(p), 3), n_deals), lambda: streak_distribution(round(float(p), 3), n_deals), store)
+
+def optimal_mix(port, ps, bs, rho):
+    """Growth-optimal portfolio for the desk's Portfolio races, remembered per (market, rho)."""
+    return _memo("mix", (tuple(ps), tuple(bs), round(float(rho), 2)),
+                 lambda: port.optimal_allocation(list(ps), list(bs), rho))
+
+def warm(p_matrix, b_vals, horizons):
+    """
+    Starts a background pass that precomputes every scenario's ruin curves
+    (at each race horizon) and the streak distributions the lab will ask for.
+    Runs once per scenario table.
+    """
+    key = (tuple((m, tuple(sorted(row.items()))) for m, row in p_matrix.items()), tuple(sorted(b_vals.items())),
+           tuple(horizons["race_options"]), horizons["wealth_deals"], horizons["career_deals"], horizons["audit_cases"])
+    store = _store()
+    with store["lock"]:
+        if key in store["warmed"]:
+            return
+        store["warmed"].add(key)
+
+    # The lab asks for streaks at the audited p, which is always a whole count
+    # out of audit_cases; warm every such p, closest to a scenario's true p first.
+    true_ps = [p for row in p_matrix.values() for p in row.values()]
+    n_audit = horizons["audit_cases"]
+    audit_ps = sorted({round(k / n_audit, 3) for k in range(n_audit + 1)},
+                      key=lambda q: min(abs(q - p) for p in true_ps))
+
+    def run():
+        for row in p_matrix.values():
+            for sec, p in row.items():
+                for horizon in sorted(set(horizons["race_options"]) | {horizons["wealth_deals"]}):
+                    ruin_probability(p, b_vals[sec], horizon, 0.0, store)
+        for p in audit_ps:
+            streaks(p, horizons["career_deals"], store)
+
+    threading.Thread(target=run, name="vc-truth-warmup", daemon=True).start()
+
+# --- END OF TRUTH FILE ---
@@ -1,4 +1,7 @@
 import streamlit as st
+import streamlit.components.v1 as components
+from pathlib import Path
+import importlib.util
 import numpy as np
 import pandas as pd
 
@@ -20,31 +23,108 @@ if not st.session_state.authenticated:
             st.error("Invalid credentials.")
     st.stop()
 
+# --- MODULE LOADING ---
+def load_mod(name):
+    path = Path(__file__).parent.parent / name
+    if not path.exists():
+        return None
+    spec = importlib.util.spec_from_file_location(name, str(path))
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+ven = load_mod("01_venue_engine.py")
+autoplay = load_mod("01_venue_autoplay.py")
+races = load_mod("01_race_registry.py")
+sim_cache = load_mod("00_sim_cache.py")
+jobs = load_mod("00_job_scheduler.py")
+
+if ven is None or autoplay is None or races is None or sim_cache is None or jobs is None:
+    st.error("❌ Critical Error: Could not load Venue Engine files.")
+    st.stop()
+
 # --- INITIALIZE SESSION STATE ---
-if 'market_list' not in st.session_state:
-    st.session_state.market_list = None
+# The single-race market lives as a seed (+ generator version) and is rebuilt on demand
+if 'market_seed' not in st.session_state:
+    st.session_state.market_seed = None
+if 'market_version' not in st.session_state:
+    st.session_state.market_version = ven.MARKET_VERSION
 if 'current_step' not in st.session_state:
     st.session_state.current_step = 0
 if 'student_results' not in st.session_state:
     st.session_state.student_results = {}
+if 'autoplay' not in st.session_state:
+    st.session_state.autoplay = False
+# Truth Engine cap: every batch is scored in bulk, so a full class can be run over a million markets
+TRIAL_LIMIT = 1_000_000
+# Largest market any variant here can deal (the Unknown Pool slider's top end); rules are read against it
+POOL_LIMIT = 250
+
 if 'sim_total_trials' not in st.session_state:
     st.session_state.sim_total_trials = 0
 if 'sim_total_wins' not in st.session_state:
     st.session_state.sim_total_wins = {}
+if 'sim_total_payoff' not in st.session_state:
+    st.session_state.sim_total_payoff = {}
+if 'sim_variant' not in st.session_state:
+    st.session_state.sim_variant = ven.make_variant()
+# Batches are seeded from (race seed, batch number), so a replayed race comes straight from the cache
+if 'sim_seed' not in st.session_state:
+    st.session_state.sim_seed = ven.new_seed()
+if 'sim_batches' not in st.session_state:
+    st.session_state.sim_batches = 0
 
 # Persistent Data Storage - Default strategies are intentionally non-optimal
 if 'student_data' not in st.session_state:
     st.session_state.student_data = pd.DataFrame([
-        {"Student": "Alice", "N": 15.00},
-        {"Student": "Bob", "N": 45.00},
-        {"Student": "Charlie", "N": 75.00}
+        {"Student": "Alice", "N": 15.00, "Rule": ""},
+        {"Student": "Bob", "N": 45.00, "Rule": ""},
+        {"Student": "Charlie", "N": 75.00, "Rule": ""}
     ])
 
+def student_rules(df):
+    """(name, label, rule) per registered student. A filled-in Rule overrides the plain N cutoff."""
+    out = []
+    for _, row in df.iterrows():
+        text = row.get("Rule", "")
+        text = str(text).strip() if pd.notna(text) else ""
+        if text:
+            out.append((str(row["Student"]), f"{row['Student']} ({text})", ven.parse_rule(text, POOL_LIMIT)))
+        else:
+            n_val = float(row["N"])
+            out.append((str(row["Student"]), f"{row['Student']} ({n_val}%)", ven.cutoff_rule(np.floor(n_val))))
+    return out
+
+def score_batch(rules, trials, seed, variant):
+    """
+    Scores each distinct rule once on this batch and fans the result out to
+    every student who registered it. Rules already scored on the same batch
+    (by any session in this process) come from the shared cache.
+    """
+    var_key = tuple(sorted(variant.items()))
+    groups = sim_cache.group_strategies([ven.describe_rule(r) for r in rules])
+    keys = {text: ("venue", text, var_key, seed, trials) for text in groups}
+    scores = {text: sim_cache.lookup(key) for text, key in keys.items()}
+    missing = [text for text, score in scores.items() if score is None]
+    if missing:
+        # The batch runs chunk by chunk on the shared scheduler, taking turns with other classes
+        to_score = [rules[groups[text][0]] for text in missing]
+        plan = ven.chunk_plan(seed, trials)
+        parts = jobs.run_job(f"{len(to_score)} venue rules x {trials:,} markets",
+                             [lambda cs=cs, n=n: ven.score_chunk(to_score, cs, n, variant) for cs, n in plan],
+                             units=[n for _, n in plan])
+        fresh = ven.merge_scores(parts, trials)
+        for text, score in zip(missing, fresh):
+            sim_cache.store_result(keys[text], score)
+            scores[text] = score
+    return [scores[ven.describe_rule(r)] for r in rules]
+
 # --- 1. STRATEGY REGISTRATION ---
 st.title("👨‍🏫 Teacher Console: Market Auctioneer")
 
-with st.expander("📝 Register Student Cutoffs", expanded=(st.session_state.market_list is None)):
-    st.info("Register student strategies as percentages. Decimals allowed.")
+with st.expander("📝 Register Student Cutoffs", expanded=(st.session_state.market_seed is None)):
+    st.info("Register student strategies as percentages. Decimals allowed. "
+            f"Advanced students can enter a Rule instead ({ven.RULE_HELP}).")
     
     # Editor with NumberColumn config for decimal precision
     edited_df = st.data_editor(
@@ -61,6 +141,10 @@ with st.expander("📝 Register Student Cutoffs", expanded=(st.session_state.mar
                 step=0.01,
                 format="%.2f",
                 default=25.00 # Generic default for new rows
+            ),
+            "Rule": st.column_config.TextColumn(
+                "Rule (optional)",
+                help=f"Overrides N. Formats: {ven.RULE_HELP}",
             )
         }
     )
@@ -70,25 +154,45 @@ with st.expander("📝 Register Student Cutoffs", expanded=(st.session_state.mar
             edited_df.columns = ["Student", "N"] + list(edited_df.columns[2:])
         
         edited_df["N"] = pd.to_numeric(edited_df["N"], errors='coerce').fillna(0.0)
-        st.session_state.student_data = edited_df
-        st.success("Registry updated. No spoilers active!")
-        st.rerun()
+        try:
+            student_rules(edited_df)
+        except ValueError as e:
+            st.error(f"Registry not saved. {e}")
+        else:
+            st.session_state.student_data = edited_df
+            st.success("Registry updated. No spoilers active!")
+            st.rerun()
 
 # --- 2. THE MANUAL REVEAL ENGINE ---
 st.divider()
 st.header("🏁 The Manual Reveal (Single Race)")
 
-col_ctrl1, col_ctrl2, col_ctrl3, col_ctrl4 = st.columns([1, 1, 1, 1])
+col_ctrl1, col_ctrl2, col_ctrl3, col_ctrl4, col_ctrl5 = st.columns([1, 1, 1, 1, 1])
+speed = st.sidebar.select_slider("Auto-Play Speed (ms per venue)", [50, 100, 150, 250, 400], value=150)
 
 if col_ctrl1.button("🎲 Generate New Market", use_container_width=True):
-    st.session_state.market_list = np.random.permutation(np.arange(1, 101))
+    st.session_state.market_seed = ven.new_seed()
+    st.session_state.market_version = ven.MARKET_VERSION
     st.session_state.current_step = 0
     st.session_state.student_results = {}
+    st.session_state.autoplay = False
     st.rerun()
 
-if st.session_state.market_list is not None:
+if st.session_state.market_seed is not None:
     step = st.session_state.current_step
-    market = st.session_state.market_list
+    market = ven.market_from_seed(st.session_state.market_seed, st.session_state.market_version)
+
+    # Broadcast: every student lab following the class race switches to this exact market
+    live = races.current_race()
+    is_live = live is not None and (live["seed"], live["version"]) == (st.session_state.market_seed, st.session_state.market_version)
+    pub_col1, pub_col2 = st.columns([1, 3])
+    if pub_col1.button("📡 Publish Race Seed", use_container_width=True, disabled=is_live):
+        races.publish_race(st.session_state.market_seed, st.session_state.market_version)
+        st.rerun()
+    if is_live:
+        pub_col2.success(f"Race seed **{st.session_state.market_seed}** is live in every student lab.")
+    else:
+        pub_col2.caption(f"Race seed {st.session_state.market_seed} (not yet published to students)")
     
     if step < 100:
         if col_ctrl2.button("➡️ Next Venue", type="primary", use_container_width=True):
@@ -97,111 +201,186 @@ if st.session_state.market_list is not None:
         if col_ctrl3.button("⏩ Fast Forward", use_container_width=True):
             st.session_state.current_step = 100
             st.rerun()
-    if col_ctrl4.button("🔄 Reset This Reveal", use_container_width=True):
+        # Auto-Play: resolve every booking here once, then let the browser animate the reveal
+        if col_ctrl4.button("▶️ Auto-Play", use_container_width=True):
+            entries = student_rules(st.session_state.student_data)
+            picks = ven.resolve_rules(market, [rule for _, _, rule in entries])
+            st.session_state.student_results = {
+                name: {"Location": loc, "Value": val, "Rank": int(101 - val)}
+                for (name, _, _), (loc, val) in zip(entries, picks)
+            }
+            st.session_state.current_step = max([loc for loc, _ in picks], default=100)
+            st.session_state.autoplay = True
+            st.rerun()
+    if col_ctrl5.button("🔄 Reset This Reveal", use_container_width=True):
         st.session_state.current_step = 0
         st.session_state.student_results = {}
+        st.session_state.autoplay = False
         st.rerun()
 
-    if step > 0:
+    if st.session_state.autoplay:
+        # One-shot: later reruns fall back to the static table below
+        st.session_state.autoplay = False
+        entries = student_rules(st.session_state.student_data)
+        students = [(label, ven.look_length(rule), None if rule["kind"] == "cutoff" else ven.describe_rule(rule))
+                    for _, label, rule in entries]
+        picks = [(st.session_state.student_results[name]["Location"],
+                  st.session_state.student_results[name]["Value"]) for name, _, _ in entries]
+        components.html(autoplay.console_autoplay_html(market, students, picks, speed),
+                        height=160 + 42 * len(students), scrolling=True)
+    elif step > 0:
         m1, m2 = st.columns(2)
         curr_val = market[step-1]
         m1.metric("Current Venue", f"#{step}")
         m2.metric("Venue Value", f"{curr_val}")
         
-        df = st.session_state.student_data
-        for s_idx in range(1, step + 1):
-            val_at_s = market[s_idx-1]
-            for _, row in df.iterrows():
-                name = str(row["Student"])
-                n_count = int(np.floor(float(row["N"])))
-                
-                if name not in st.session_state.student_results:
-                    benchmark = np.max(market[:n_count]) if n_count > 0 else 0
-                    if s_idx > n_count:
-                        if val_at_s > benchmark or s_idx == 100:
-                            st.session_state.student_results[name] = {
-                                "Location": int(s_idx), "Value": int(val_at_s), "Rank": int(101 - val_at_s)
-                            }
+        # Every student's booking on this market, resolved in one pass; revealed once the step reaches it
+        entries = student_rules(st.session_state.student_data)
+        picks = ven.resolve_rules(market, [rule for _, _, rule in entries])
+        for (name, _, _), (loc, val) in zip(entries, picks):
+            if name not in st.session_state.student_results and step >= loc:
+                st.session_state.student_results[name] = {"Location": loc, "Value": val, "Rank": int(101 - val)}
 
         status_list = []
-        for _, row in df.iterrows():
-            name = str(row["Student"])
-            n_val = float(row["N"])
-            n_count = int(np.floor(n_val))
+        for name, label, rule in entries:
+            n_count = ven.look_length(rule)
             
             if name in st.session_state.student_results:
                 res = st.session_state.student_results[name]
                 status = f"✅ BOOKED (Loc: #{res.get('Location')}, Val: {res.get('Value')}, Rank: {res.get('Rank')})"
             elif step <= n_count:
                 status = f"🔍 Researching (Target: {np.max(market[:step]) if step > 0 else 0})"
+            elif rule["kind"] != "cutoff":
+                status = f"👀 Searching ({ven.describe_rule(rule)})"
             else:
                 benchmark = np.max(market[:n_count]) if n_count > 0 else 0
                 status = f"👀 Searching (Target: >{benchmark})"
-            status_list.append({"Student": f"{name} ({n_val}%)", "Status": status})
+            status_list.append({"Student": label, "Status": status})
         st.table(pd.DataFrame(status_list))
 
 # --- 3. THE TRUTH ENGINE ---
 st.divider()
-st.header("🧪 The Truth Engine (Limit: 10,000 Trials)")
+st.header(f"🧪 The Truth Engine (Limit: {TRIAL_LIMIT:,} Trials)")
+
+# Variant selector: changing the game throws away results scored under the old one
+var_col1, var_col2 = st.columns([1, 2])
+variant_kinds = {label: kind for kind, label in ven.VARIANTS.items()}
+kind = variant_kinds[var_col1.selectbox("Game Variant", list(variant_kinds),
+                                        index=list(ven.VARIANTS).index(st.session_state.sim_variant["kind"]))]
+# The seed lives outside the widget's key so it survives runs where this panel isn't drawn (e.g. Log Out)
+st.session_state.sim_seed = int(var_col1.number_input(
+    "Race Seed", 0, ven.MAX_SEED - 1, value=st.session_state.sim_seed, key="sim_seed_input",
+    help="Batches are drawn from this seed. Reuse it to replay an earlier section's race."))
+with var_col2:
+    if kind == "unknown_pool":
+        pool = st.slider("Pool Size Range (hidden from students)", 10, POOL_LIMIT, (50, 150))
+        variant = ven.make_variant(kind, pool_min=pool[0], pool_max=pool[1])
+        st.caption("Cutoffs count venues, not percent: nobody knows where 100% is.")
+    elif kind == "top_k":
+        variant = ven.make_variant(kind, top_k=st.slider("Win if booked venue is in the top k", 1, 20, 5))
+    elif kind == "recall":
+        variant = ven.make_variant(kind, recall_prob=st.slider(
+            "Chance the best passed venue is still free", 0.0, 1.0, 0.5, 0.05))
+        st.caption("A rule that never fires goes back for the best venue it passed instead of taking the last one.")
+    elif kind == "cardinal":
+        variant = ven.make_variant(kind)
+        st.caption("Venues score 0-100 at random; thresholds compare against the score, and the payoff is the score booked.")
+    else:
+        variant = ven.make_variant(kind)
+
+if variant != st.session_state.sim_variant:
+    st.session_state.sim_variant = variant
+    st.session_state.sim_total_trials = 0
+    st.session_state.sim_batches = 0
+    st.session_state.sim_total_wins = {}
+    st.session_state.sim_total_payoff = {}
+
+# Rules are read against the widest pool; flag the ones this variant's markets can be too short for
+smallest, largest = ven.pool_range(variant)
+too_long = [label for _, label, rule in student_rules(st.session_state.student_data)
+            if ven.look_length(rule) >= smallest]
+if too_long:
+    sizes = f"{largest}" if smallest == largest else f"{smallest}-{largest}"
+    st.warning(f"This variant deals {sizes} venues. These rules can look past the last venue and then book "
+               f"the fallback: {', '.join(too_long)}")
 
 sim_col1, sim_col2, sim_col3 = st.columns([1, 1, 2])
-remaining = max(0, 10000 - st.session_state.sim_total_trials)
+remaining = max(0, TRIAL_LIMIT - st.session_state.sim_total_trials)
 
 batch_to_add = sim_col1.number_input(
     "Trials to Add:", 
-    min_value=1, max_value=min(5000, remaining) if remaining > 0 else 1, 
+    min_value=1, max_value=min(200_000, remaining) if remaining > 0 else 1, 
     value=min(100, remaining) if remaining > 0 else 1, step=10
 )
 
 if remaining > 0:
     if sim_col2.button("🏁 Run Next Batch", use_container_width=True, type="primary"):
-        df = st.session_state.student_data
-        names = df["Student"].tolist()
-        ns = [int(np.floor(float(val))) for val in df["N"].tolist()]
+        entries = student_rules(st.session_state.student_data)
         
-        for name in names:
+        for name, _, _ in entries:
             if name not in st.session_state.sim_total_wins: st.session_state.sim_total_wins[name] = 0
-            
-        for _ in range(batch_to_add):
-            for i, n in enumerate(ns):
-                s = np.random.permutation(np.arange(1, 101))
-                b = np.max(s[:n]) if n > 0 else 0
-                p = s[-1]
-                for v in s[n:]:
-                    if v > b: p = v; break
-                if p == 100: st.session_state.sim_total_wins[names[i]] += 1
+            if name not in st.session_state.sim_total_payoff: st.session_state.sim_total_payoff[name] = 0.0
+        
+        # Every strategy is scored on the same batch of markets
+        seed = sim_cache.batch_seed(st.session_state.sim_seed, st.session_state.sim_batches)
+        scores = score_batch([rule for _, _, rule in entries], int(batch_to_add), seed, st.session_state.sim_variant)
+        for (name, _, _), score in zip(entries, scores):
+            st.session_state.sim_total_wins[name] += score["wins"]
+            st.session_state.sim_total_payoff[name] += score["mean_payoff"] * score["trials"]
         
         st.session_state.sim_total_trials += batch_to_add
+        st.session_state.sim_batches += 1
         st.rerun()
 
 if sim_col3.button("🗑️ Reset Simulation Data", use_container_width=True):
     st.session_state.sim_total_trials = 0
+    st.session_state.sim_batches = 0
     st.session_state.sim_total_wins = {}
+    st.session_state.sim_total_payoff = {}
     st.rerun()
 
+cache = sim_cache.cache_stats()
+sim_col3.caption(f"Shared result cache: {cache['hits']:,} hits / {cache['misses']:,} misses "
+                 f"({cache['size']}/{cache['capacity']} batches kept)")
+
+with st.expander("🖥️ Server Load (all instructors on this server)"):
+    load = jobs.scheduler().stats()
+    l_col1, l_col2, l_col3 = st.columns(3)
+    l_col1.metric("Chunks Queued", load["queue_depth"], help=f"Sessions waiting: {load['sessions_waiting']}")
+    l_col2.metric("Throughput", f"{load['trials_per_s']:,.0f} trials/s", help="Average over the last minute")
+    l_col3.metric("Workers", load["workers"])
+    if load["jobs"]:
+        st.table(pd.DataFrame(load["jobs"]))
+
 if st.session_state.sim_total_trials > 0:
-    st.subheader(f"📊 Current Progress: {st.session_state.sim_total_trials:,} / 10,000 Trials")
+    st.subheader(f"📊 Current Progress: {st.session_state.sim_total_trials:,} / {TRIAL_LIMIT:,} Trials")
+    st.caption(f"Variant: {ven.describe_variant(st.session_state.sim_variant)}")
     
-    n_lookup = dict(zip(st.session_state.student_data["Student"], st.session_state.student_data["N"]))
-    res_data = [{"Label": f"{n} ({n_lookup[n]}%)", "Rate": (w/st.session_state.sim_total_trials)*100} 
+    trials = st.session_state.sim_total_trials
+    n_lookup = {name: label for name, label, _ in student_rules(st.session_state.student_data)}
+    res_data = [{"Label": n_lookup[n], "Rate": (w/trials)*100,
+                 "Payoff": st.session_state.sim_total_payoff.get(n, 0.0)/trials}
                 for n, w in st.session_state.sim_total_wins.items() if n in n_lookup]
     
     if res_data:
         plot_df = pd.DataFrame(res_data).sort_values("Rate", ascending=True)
-        st.vega_lite_chart(plot_df, {
-            "mark": {"type": "bar", "height": 18},
-            "encoding": {
-                "y": {"field": "Label", "type": "nominal", "sort": "-x", "title": ""},
-                "x": {"field": "Rate", "type": "quantitative", "scale": {"domain": [0, 100]}, "title": "Observed Win Rate (%)"},
-                "color": {"field": "Label", "type": "nominal", "legend": None, "scale": {"scheme": "category20"}}
-            }
-        }, use_container_width=True)
+        chart_col1, chart_col2 = st.columns(2)
+        for col, field, title in [(chart_col1, "Rate", "Observed Win Rate (%)"),
+                                  (chart_col2, "Payoff", "Expected Payoff (0-100)")]:
+            col.vega_lite_chart(plot_df, {
+                "mark": {"type": "bar", "height": 18, "tooltip": True},
+                "encoding": {
+                    "y": {"field": "Label", "type": "nominal", "sort": "-x", "title": ""},
+                    "x": {"field": field, "type": "quantitative", "scale": {"domain": [0, 100]}, "title": title},
+                    "color": {"field": "Label", "type": "nominal", "legend": None, "scale": {"scheme": "category20"}}
+                }
+            }, use_container_width=True)
 
 # --- MARKET TRUTH ---
 st.divider()
-if st.session_state.market_list is not None:
+if st.session_state.market_seed is not None:
     with st.expander("🕵️ Private Market Intel (Single Race)"):
-        best_pos = np.where(st.session_state.market_list == 100)[0][0] + 1
+        best_pos = np.where(market == 100)[0][0] + 1
         st.write(f"In the current Single Race reveal, the #1 Venue is located at Position: **{best_pos}**")
 
 with st.sidebar:
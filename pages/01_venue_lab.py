@@ -1,17 +1,44 @@
 import streamlit as st
+import streamlit.components.v1 as components
+from pathlib import Path
+import importlib.util
 import numpy as np
 import pandas as pd
 
-# --- 1. INITIALIZE SESSION STATE ---
-if 'lab_market' not in st.session_state:
-    st.session_state.lab_market = np.random.permutation(np.arange(1, 101))
+# --- 0. MODULE LOADING ---
+def load_mod(name):
+    path = Path(__file__).parent.parent / name
+    if not path.exists():
+        return None
+    spec = importlib.util.spec_from_file_location(name, str(path))
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+ven = load_mod("01_venue_engine.py")
+autoplay = load_mod("01_venue_autoplay.py")
+races = load_mod("01_race_registry.py")
+
+# --- 1. CONFIG ---
+st.set_page_config(page_title="Strategy Training Lab", layout="wide")
+
+if ven is None or autoplay is None or races is None:
+    st.error("❌ Critical Error: Could not load Venue Engine files.")
+    st.stop()
+
+# --- 2. INITIALIZE SESSION STATE ---
+# Only the market's seed is kept per session; the 100 venues are rebuilt from it each run
+def start_market(seed, version):
+    st.session_state.lab_seed = seed
+    st.session_state.lab_version = version
     st.session_state.current_index = 0
     st.session_state.benchmark = 0
     st.session_state.choice_made = False
     st.session_state.final_choice = None
+    st.session_state.autoplay = False
 
-# --- 2. CONFIG ---
-st.set_page_config(page_title="Strategy Training Lab", layout="wide")
+if 'lab_seed' not in st.session_state:
+    start_market(ven.new_seed(), ven.MARKET_VERSION)
 
 st.title("🧪 Strategy Training Lab")
 st.markdown("""
@@ -24,17 +51,41 @@ st.markdown("""
 with st.sidebar:
     st.header("Lab Configuration")
     n_look = st.slider("Look Phase (N Venues)", 1, 100, 1)
+    rule_text = st.text_input("Advanced Rule (optional)", placeholder="e.g. rank:30:2",
+                              help=f"Overrides the slider. Formats: {ven.RULE_HELP}")
+    speed = st.select_slider("Auto-Play Speed (ms per venue)", [50, 100, 150, 250, 400], value=150)
+
+    # Class race: pick up whatever market the instructor has published
+    live = races.current_race()
+    follow = st.toggle("📡 Play the Class Race", value=True, disabled=live is None,
+                       help="Play the same market your instructor is revealing.")
+    on_class_race = follow and live is not None
+    if on_class_race and (live["seed"], live["version"]) != (st.session_state.lab_seed, st.session_state.lab_version):
+        start_market(live["seed"], live["version"])
+        st.rerun()
+    # The seed rebuilds the whole market, so it stays on the instructor's screen
+    st.caption("A class race is live." if live else "No class race published yet.")
     
-    if st.button("♻️ Reset Lab / New Market"):
-        st.session_state.lab_market = np.random.permutation(np.arange(1, 101))
-        st.session_state.current_index = 0
-        st.session_state.benchmark = 0
-        st.session_state.choice_made = False
-        st.session_state.final_choice = None
+    if st.button("♻️ Restart Class Race" if on_class_race else "♻️ Reset Lab / New Market"):
+        if on_class_race:
+            start_market(live["seed"], live["version"])
+        else:
+            start_market(ven.new_seed(), ven.MARKET_VERSION)
         st.rerun()
 
-market = st.session_state.lab_market
+# The strategy being practised: the plain look-then-leap cutoff, or a typed-in rule
+rule = ven.cutoff_rule(n_look)
+if rule_text.strip():
+    try:
+        rule = ven.parse_rule(rule_text)
+    except ValueError as e:
+        st.sidebar.error(f"{e}. Using the slider cutoff instead.")
+n_look = ven.look_length(rule)
+search_label = None if rule["kind"] == "cutoff" else ven.describe_rule(rule)
+
+market = ven.market_from_seed(st.session_state.lab_seed, st.session_state.lab_version)
 curr_idx = st.session_state.current_index
+pick = ven.resolve_rules(market, [rule])[0]
 
 # --- 4. THE INTERACTIVE INTERFACE ---
 col_ctrl, col_log = st.columns([1, 2])
@@ -47,7 +98,8 @@ with col_ctrl:
         if curr_idx < n_look:
             st.warning(f"PHASE: LOOKING (Venue {curr_idx + 1} of {n_look})")
         else:
-            st.success(f"PHASE: SEARCHING (Must beat {st.session_state.benchmark})")
+            st.success(f"PHASE: SEARCHING ({search_label})" if search_label
+                       else f"PHASE: SEARCHING (Must beat {st.session_state.benchmark})")
     else:
         st.info("PROCESS COMPLETE")
 
@@ -56,17 +108,12 @@ with col_ctrl:
         # Top Row: Single Step
         if st.button("➡️ Reveal Next Venue", type="primary", use_container_width=True):
             val = market[curr_idx]
-            if curr_idx < n_look:
-                if val > st.session_state.benchmark:
-                    st.session_state.benchmark = val
-            else:
-                if val > st.session_state.benchmark:
-                    st.session_state.choice_made = True
-                    st.session_state.final_choice = (curr_idx + 1, val)
-            
-            if not st.session_state.choice_made and curr_idx == 99:
+            if curr_idx < n_look and val > st.session_state.benchmark:
+                st.session_state.benchmark = val
+            if (curr_idx >= n_look and curr_idx + 1 == pick[0]) or curr_idx == 99:
+                # The rule fires here; if it never does (or you looked at every venue) you get the last one
                 st.session_state.choice_made = True
-                st.session_state.final_choice = (100, market[99])
+                st.session_state.final_choice = pick if curr_idx + 1 == pick[0] else (100, int(market[99]))
             
             st.session_state.current_index += 1
             st.rerun()
@@ -78,30 +125,23 @@ with col_ctrl:
         can_ff_search = curr_idx < n_look
         if f_col1.button("⏩ Jump to Search", use_container_width=True, disabled=not can_ff_search):
             # Calculate benchmark up to n_look immediately
-            st.session_state.benchmark = np.max(market[:n_look])
+            st.session_state.benchmark = np.max(market[:n_look]) if n_look > 0 else 0
             st.session_state.current_index = n_look
             st.rerun()
 
-        # FF to Result
-        if f_col2.button("🏁 Leap to Result", use_container_width=True):
-            bench = np.max(market[:n_look])
-            found = False
-            for i in range(n_look, 100):
-                if market[i] > bench:
-                    st.session_state.final_choice = (i + 1, market[i])
-                    st.session_state.current_index = i + 1
-                    found = True
-                    break
-            if not found:
-                st.session_state.final_choice = (100, market[99])
-                st.session_state.current_index = 100
-            
-            st.session_state.benchmark = bench
+        # FF to Result (Auto-Play lands in the same place, but animates the walk in the browser)
+        leap = f_col2.button("🏁 Leap to Result", use_container_width=True)
+        play = st.button("▶️ Auto-Play Reveal", use_container_width=True)
+        if leap or play:
+            st.session_state.final_choice = pick
+            st.session_state.current_index = pick[0]
+            st.session_state.benchmark = np.max(market[:n_look]) if n_look > 0 else 0
             st.session_state.choice_made = True
+            st.session_state.autoplay = play
             st.rerun()
 
-    # Results Display
-    if st.session_state.choice_made:
+    # Results Display (held back while the Auto-Play animation reveals it)
+    if st.session_state.choice_made and not st.session_state.autoplay:
         loc, val = st.session_state.final_choice
         st.divider()
         st.metric("Your Selection", f"Rank {val}", f"At Position #{loc}")
@@ -120,6 +160,13 @@ with col_ctrl:
 
 with col_log:
     st.subheader("Activity Log")
+    if st.session_state.autoplay:
+        # One-shot: the next rerun shows the full result and static log
+        st.session_state.autoplay = False
+        components.html(autoplay.lab_autoplay_html(market, n_look, st.session_state.final_choice, speed, search_label),
+                        height=520, scrolling=True)
+        st.button("📋 Show Full Result", use_container_width=True)
+        st.stop()
     history = []
     for i in range(st.session_state.current_index):
         val = market[i]
@@ -134,7 +181,11 @@ with col_log:
         st.info("Use controls to start.")
 
 # --- 5. AUDIT ---
-if st.session_state.choice_made:
+# Held back while this is the published class market (even with the toggle off): it would show
+# everyone the market before the instructor's reveal
+on_class_market = live is not None and (live["seed"], live["version"]) == (st.session_state.lab_seed,
+                                                                           st.session_state.lab_version)
+if st.session_state.choice_made and not on_class_market:
     with st.expander("🔍 Full Market Audit"):
         st.dataframe(pd.DataFrame({
             "Position": range(1, 101),
@@ -24,22 +24,35 @@ def load_mod(name):
 
 nav = load_mod("02_vc_lab_narrative.py")
 inst_eng = load_mod("02_vc_instructor_engine.py")
+port = load_mod("02_vc_portfolio_engine.py")
+sim_cache = load_mod("00_sim_cache.py")
+jobs = load_mod("00_job_scheduler.py")
+truth = load_mod("02_vc_truth.py")
 
-if nav is None or inst_eng is None:
+if nav is None or inst_eng is None or port is None or sim_cache is None or jobs is None or truth is None:
     st.error("Missing critical helper files (Narrative or Instructor Engine) in Root.")
     st.stop()
 
+# Funds per scheduler chunk in a Horse Race batch
+CHUNK_FUNDS = 250
+
 # --- 3. SESSION STATE INITIALIZATION ---
 if "contestants" not in st.session_state:
     st.session_state.contestants = []
-    st.session_state.results_data = {}  # Stores raw final wealth values: {Name: [results]}
+    st.session_state.results_data = {}  # Stores final log-wealth (float32) per batch: {Name: [arrays]}
     st.session_state.sim_total_trials = 0
     st.session_state.colors = {}       # Mapping of student names to colors
+if "race_horizon" not in st.session_state:
+    st.session_state.race_horizon = None
+# Batches are seeded from (race seed, batch number), so a replayed race comes straight from the cache
+if "race_seed" not in st.session_state:
+    st.session_state.race_seed = int(np.random.randint(0, 1_000_000))
+    st.session_state.race_batches = 0
 
 # --- 4. UI SETUP ---
 st.title("🏆 VC Competition: The Horse Race")
 
-pwd = st.sidebar.text_input("Instructor Password", type="password")
+pwd = st.sidebar.text_input("Instructor Password", type="password", key="desk_password")
 
 if pwd == "VC_LEADER":
     show_truth = st.sidebar.checkbox("🔓 REVEAL MEDIAN TRUTH", value=False)
@@ -47,6 +60,15 @@ if pwd == "VC_LEADER":
     with st.expander("🛠️ Secret Scenario Configuration", expanded=True):
         col1, col2 = st.columns(2)
         m_sel = col1.selectbox("Set Secret Market", list(nav.MARKET_STORIES.keys()))
+        race_format = col2.radio("Competition Format", ["Single Sector", "Portfolio"], horizontal=True)
+        rho = col2.slider("Market Correlation (ρ)", 0.0, 0.95, 0.3, 0.05,
+                          disabled=(race_format != "Portfolio"),
+                          help="How strongly sector outcomes move with the shared market in a Portfolio race.")
+        horizons = nav.HORIZONS["race_options"]
+        default_h = nav.HORIZONS["wealth_deals"]
+        horizon = col1.selectbox("Career Horizon (deals)", horizons,
+                                 index=horizons.index(default_h) if default_h in horizons else 0,
+                                 help="Set the available horizons in 02_vc_scenarios.json.")
         
         # GROUND TRUTH SYNC: Pulling directly from your hand-tuned Narrative file
         p_matrix = nav.P_MATRIX 
@@ -54,21 +76,42 @@ if pwd == "VC_LEADER":
         st.write("### Current Ground Truth Probabilities:")
         st.json(p_matrix[m_sel])
 
+    # A new horizon is a different race: results from the old one are cleared
+    if horizon != st.session_state.race_horizon:
+        st.session_state.race_horizon = horizon
+        st.session_state.sim_total_trials = 0
+        st.session_state.race_batches = 0
+        for name in st.session_state.results_data:
+            st.session_state.results_data[name] = []
+
     st.header("📢 Current Market Briefing")
     st.info(f"**Field Report:** {nav.MARKET_STORIES[m_sel]}")
 
     # STUDENT ENTRY FORM
     st.subheader("Contestant Registration")
     with st.form("entry_form", clear_on_submit=True):
-        f_col1, f_col2, f_col3 = st.columns([2, 2, 1])
-        s_name = f_col1.text_input("Student Name")
-        s_sec = f_col2.selectbox("Chosen Sector", list(nav.TYPE_STORY.keys()))
-        s_f = f_col3.number_input("Strategy (f)", 0.0, 1.0, 0.1, step=0.01)
+        sectors = list(nav.TYPE_STORY.keys())
+        if race_format == "Portfolio":
+            f_cols = st.columns([2] + [1] * len(sectors))
+            s_name = f_cols[0].text_input("Student Name")
+            s_w = [f_cols[i + 1].number_input(f"w: {sec}", 0.0, 1.0, 0.0, step=0.01) for i, sec in enumerate(sectors)]
+        else:
+            f_col1, f_col2, f_col3 = st.columns([2, 2, 1])
+            s_name = f_col1.text_input("Student Name")
+            s_sec = f_col2.selectbox("Chosen Sector", sectors)
+            s_f = f_col3.number_input("Strategy (f)", 0.0, 1.0, 0.1, step=0.01)
         
         if st.form_submit_button("Add Strategy"):
-            if s_name:
-                # Add to contestant list
-                st.session_state.contestants.append({"Name": s_name, "Sector": s_sec, "f": s_f})
+            if race_format == "Portfolio" and sum(s_w) > 1.0:
+                st.error(f"That allocation adds up to {sum(s_w):.0%}. Keep the total at or below 100%.")
+            elif s_name:
+                # Add to contestant list (a Portfolio entry carries one weight per sector)
+                if race_format == "Portfolio":
+                    mix = "/".join(f"{w:.0%}" for w in s_w)
+                    st.session_state.contestants.append({"Name": s_name, "Sector": f"Portfolio {mix}",
+                                                         "f": round(sum(s_w), 2), "Weights": s_w})
+                else:
+                    st.session_state.contestants.append({"Name": s_name, "Sector": s_sec, "f": s_f})
                 # Initialize their color and data slot
                 palette = ["#FF4B4B", "#1C83E1", "#00C0F2", "#FFD166", "#06D6A0", "#118AB2", "#EE82EE", "#FFA500"]
                 if s_name not in st.session_state.colors:
@@ -79,13 +122,14 @@ if pwd == "VC_LEADER":
     # --- 5. THE PENDING ROSTER ---
     if st.session_state.contestants:
         st.write("### Registered Contestants")
-        roster_df = pd.DataFrame(st.session_state.contestants)
+        roster_df = pd.DataFrame(st.session_state.contestants).drop(columns=["Weights"], errors="ignore")
         st.table(roster_df)
         
         if st.button("Clear All Contestants"):
             st.session_state.contestants = []
             st.session_state.results_data = {}
             st.session_state.sim_total_trials = 0
+            st.session_state.race_batches = 0
             st.rerun()
 
         # --- 6. THE TRUTH ENGINE (HORSE RACE) ---
@@ -94,30 +138,75 @@ if pwd == "VC_LEADER":
         
         sim_col1, sim_col2, sim_col3 = st.columns([1, 1, 2])
         batch_to_add = sim_col1.number_input("Trials per Batch:", 10, 1000, 100, step=10)
+        # The seed lives outside the widget's key so it survives runs where the engine isn't shown
+        st.session_state.race_seed = int(sim_col1.number_input(
+            "Race Seed", 0, 999_999, value=st.session_state.race_seed, key="race_seed_input",
+            help="Batches are drawn from this seed. Reuse it to replay an earlier section's race."))
         
         # --- THE RUN BUTTON ---
         if sim_col2.button("🏁 Run Next Batch", type="primary", use_container_width=True):
             num_to_run = int(batch_to_add) 
+            sectors = list(nav.B_VALS.keys())
+            seed = sim_cache.batch_seed(st.session_state.race_seed, st.session_state.race_batches)
+            
+            # Identical strategies are simulated once and shared by everyone who entered them
+            def strategy_key(c):
+                if "Weights" in c:
+                    return ("portfolio", tuple(float(w) for w in c['Weights']),
+                            tuple(p_matrix[m_sel][sec] for sec in sectors),
+                            tuple(nav.B_VALS[sec] for sec in sectors), float(rho), horizon)
+                return ("sector", float(c['f']), p_matrix[m_sel][c['Sector']], nav.B_VALS[c['Sector']], horizon)
+            
+            def simulate(key, chunk_seed, n):
+                if key[0] == "portfolio":
+                    _, weights, ps, bs, k_rho, n_steps = key
+                    return port.simulate_portfolios(list(weights), list(ps), list(bs), k_rho, n_funds=n, n_steps=n_steps,
+                                                    seed=chunk_seed, log_wealth=True, dtype=np.float32)
+                _, f, p_true, b_val, n_steps = key
+                return inst_eng.run_competition_batch(f, p_true, b_val, n, n_steps=n_steps, seed=chunk_seed,
+                                                      log_wealth=True, dtype=np.float32)
             
-            for _ in range(num_to_run):
-                for c in st.session_state.contestants:
-                    p_true = p_matrix[m_sel][c['Sector']]
-                    b_val = nav.B_VALS[c['Sector']]
-                    
-                    # Simulation call
-                    final_wealth = inst_eng.run_competition_sim(c['f'], p_true, b_val)
-                    
-                    if c['Name'] not in st.session_state.results_data:
-                        st.session_state.results_data[c['Name']] = []
-                    st.session_state.results_data[c['Name']].append(final_wealth)
+            groups = sim_cache.group_strategies([strategy_key(c) for c in st.session_state.contestants])
+            finals = {key: sim_cache.lookup(key + (seed, num_to_run, "log32")) for key in groups}
+            missing = [key for key, res in finals.items() if res is None]
+            if missing:
+                # Fixed-size chunks on the shared scheduler, taking turns with other classes
+                sizes = [min(CHUNK_FUNDS, num_to_run - i) for i in range(0, num_to_run, CHUNK_FUNDS)]
+                plan = [(key, sim_cache.batch_seed(seed, i), n) for key in missing for i, n in enumerate(sizes)]
+                parts = jobs.run_job(f"{len(missing)} strategies x {num_to_run:,} funds",
+                                     [lambda k=k, cs=cs, n=n: simulate(k, cs, n) for k, cs, n in plan],
+                                     units=[n for _, _, n in plan])
+                for j, key in enumerate(missing):
+                    finals[key] = np.concatenate(parts[j * len(sizes):(j + 1) * len(sizes)])
+                    sim_cache.store_result(key + (seed, num_to_run, "log32"), finals[key])
+            
+            for key, members in groups.items():
+                for i in members:
+                    name = st.session_state.contestants[i]['Name']
+                    st.session_state.results_data.setdefault(name, []).append(finals[key])
             
             # CRITICAL: Update the counter and refresh the UI
             st.session_state.sim_total_trials += num_to_run
+            st.session_state.race_batches += 1
             st.rerun()
 
+        cache = sim_cache.cache_stats()
+        sim_col3.caption(f"Shared result cache: {cache['hits']:,} hits / {cache['misses']:,} misses "
+                         f"({cache['size']}/{cache['capacity']} batches kept)")
+
+        with st.expander("🖥️ Server Load (all instructors on this server)"):
+            load = jobs.scheduler().stats()
+            l_col1, l_col2, l_col3 = st.columns(3)
+            l_col1.metric("Chunks Queued", load["queue_depth"], help=f"Sessions waiting: {load['sessions_waiting']}")
+            l_col2.metric("Throughput", f"{load['trials_per_s']:,.0f} trials/s", help="Average over the last minute")
+            l_col3.metric("Workers", load["workers"])
+            if load["jobs"]:
+                st.table(pd.DataFrame(load["jobs"]))
+
         # --- THE RESET BUTTON (TESTING) ---
         if sim_col3.button("🔄 Reset Sim (Keep Roster)", use_container_width=True):
             st.session_state.sim_total_trials = 0
+            st.session_state.race_batches = 0
             for name in st.session_state.results_data:
                 st.session_state.results_data[name] = []
             st.rerun()
@@ -130,12 +219,19 @@ if pwd == "VC_LEADER":
         if st.session_state.sim_total_trials > 0:
             # Helper for Vibe-Coding the shorthand numbers
             def fmt_val(n):
+                if n >= 1e15: return f"${n:.1e}"
                 if n >= 1e12: return f"${n/1e12:.1f}T"
                 if n >= 1e9:  return f"${n/1e9:.1f}B"
                 if n >= 1e6:  return f"${n/1e6:.1f}M"
                 if n >= 1e3:  return f"${n/1e3:.1f}K"
                 return f"${n:.2f}"
 
+            # Results are natural-log wealth, so amounts are formatted from their log10
+            def fmt_log(l10):
+                if l10 == -np.inf: return "$0.00"
+                if l10 >= 300: return f"${10 ** (l10 % 1):.1f}e+{int(l10)}"
+                return fmt_val(10 ** l10)
+
             # --- 7a. THE TRUTH DISCLOSURE ---
             if show_truth:
                 st.warning(f"⚠️ **MARKET DISCLOSURE:** The true environment was **{m_sel}**.")
@@ -144,6 +240,16 @@ if pwd == "VC_LEADER":
                 for idx, sector in enumerate(active_sectors):
                     p_val = p_matrix[m_sel][sector]
                     cols[idx].metric(f"True P({sector})", f"{p_val*100:.0f}%")
+                    kelly = truth.growth_optimal_f(p_val, nav.B_VALS[sector])
+                    cols[idx].caption(f"Growth-optimal f = {kelly:.2f} | exact ruin in {horizon} deals at that f: "
+                                      f"{truth.ruin_probability(p_val, nav.B_VALS[sector], horizon, kelly):.1%}")
+                if race_format == "Portfolio":
+                    best_w, best_g = truth.optimal_mix(
+                        port, [p_matrix[m_sel][sec] for sec in active_sectors],
+                        [nav.B_VALS[sec] for sec in active_sectors], rho)
+                    best_mix = " / ".join(f"{sec}: {w:.0%}" for sec, w in zip(active_sectors, best_w))
+                    st.info(f"🎯 **Growth-Optimal Mix (ρ={rho:.2f}):** {best_mix} | "
+                            f"Typical fund after {horizon} deals ≈ {fmt_log((np.log(100) + horizon * best_g) / np.log(10))}")
                 st.write("") 
 
             st.write(f"**Total Universes Simulated:** {st.session_state.sim_total_trials}")
@@ -153,22 +259,28 @@ if pwd == "VC_LEADER":
             strat_lookup = {c['Name']: c for c in st.session_state.contestants}
             
             for name, results in st.session_state.results_data.items():
-                arr = np.array(results)
-                total_w = np.sum(arr)
-                log_val = np.log10(total_w + 1)
+                # Everything below stays in log space: the wealth itself can overflow a float
+                if not results:
+                    continue
+                logs = np.concatenate(results).astype(np.float64)
+                log_total = np.logaddexp.reduce(logs)
                 s_info = strat_lookup.get(name, {"Sector": "Unknown", "f": 0})
                 
-                # New calculations for the "Aha!" moment
-                current_median = np.median(arr)
-                current_mean = np.mean(arr)
+                # New calculations for the "Aha!" moment (log10 of the median and mean fund)
+                current_median = inst_eng.median_log_wealth(logs) / np.log(10)
+                current_mean = (log_total - np.log(len(logs))) / np.log(10)
                 
                 leaderboard_data.append({
                     "Name": name, 
-                    "TotalWealth": total_w,
-                    "LogVal": log_val,
+                    "TotalWealth": log_total,
+                    "LogVal": np.logaddexp(log_total, 0.0) / np.log(10),
                     "Median": current_median, 
                     "Mean": current_mean,
-                    "Insolvency": np.sum(arr <= 1.0) / len(arr),
+                    "Insolvency": np.mean(logs <= 0.0),
+                    # Exact ruin odds are only tabulated for single-sector bets
+                    "Ruin": (truth.ruin_probability(p_matrix[m_sel][s_info['Sector']], nav.B_VALS[s_info['Sector']],
+                                                    horizon, s_info['f'])
+                             if "Weights" not in s_info and s_info['Sector'] in nav.B_VALS else None),
                     "Sector": s_info['Sector'],
                     "f": s_info['f'],
                     "Color": st.session_state.colors.get(name, "#1C83E1")
@@ -193,16 +305,18 @@ if pwd == "VC_LEADER":
                 
                 # Vibe coding colors
                 # Green if making profit (>100), Red if losing or broke (<100)
-                vibe_color = "#2E7D32" if entry['Median'] >= 100 else "#D32F2F"
+                vibe_color = "#2E7D32" if entry['Median'] >= 2 else "#D32F2F"
                 
                 if not show_truth:
                     # During the race: focus on the "Bait" (Average)
-                    status_text = f"Avg: **{fmt_val(entry['Mean'])}** | {entry['Sector']} (f={entry['f']})"
+                    status_text = f"Avg: **{fmt_log(entry['Mean'])}** | {entry['Sector']} (f={entry['f']})"
                     text_color = "#444" 
                 else:
                     # The Reveal: Now showing BOTH stats + the original strategy
                     # Format: Med: $X | Avg: $Y | Sector (f=0.XX) | % Def
-                    status_text = f"**Med: {fmt_val(entry['Median'])}** | Avg: {fmt_val(entry['Mean'])} | {entry['Sector']} (f={entry['f']}) | {entry['Insolvency']:.0%} Def"
+                    status_text = f"**Med: {fmt_log(entry['Median'])}** | Avg: {fmt_log(entry['Mean'])} | {entry['Sector']} (f={entry['f']}) | {entry['Insolvency']:.0%} Def"
+                    if entry['Ruin'] is not None:
+                        status_text += f" (exact {entry['Ruin']:.0%})"
                     text_color = vibe_color
 
                 race_html = f"""
@@ -226,5 +340,8 @@ if pwd == "VC_LEADER":
 else:
     st.warning("Please enter the Instructor Password in the sidebar.")
 
+# Precompute this process's truth tables in the background once the page is on screen
+truth.warm(nav.P_MATRIX, nav.B_VALS, nav.HORIZONS)
+
 # --- PADDING ---
 # ............................................................
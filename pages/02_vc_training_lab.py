@@ -4,7 +4,6 @@ import importlib.util
 import os
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
 
 # --- 1. SET PAGE CONFIG (MUST BE ABSOLUTE FIRST) ---
 if "config_set" not in st.session_state:
@@ -28,15 +27,25 @@ def load_mod(name):
 
 nav = load_mod("02_vc_lab_narrative.py")
 eng = load_mod("02_vc_lab_engine.py")
+port = load_mod("02_vc_portfolio_engine.py")
+truth = load_mod("02_vc_truth.py")
 
-if nav is None or eng is None:
+if nav is None or eng is None or port is None or truth is None:
     st.error("❌ Critical Error: Could not load Narrative or Engine files.")
     st.stop()
 
+# Horizons come from 02_vc_scenarios.json
+N_AUDIT = nav.HORIZONS["audit_cases"]
+N_CAREER = nav.HORIZONS["career_deals"]
+N_WEALTH = nav.HORIZONS["wealth_deals"]
+
 # --- 3. SESSION STATE ---
 for k in ["cur_scen", "audit", "verified", "history"]:
     if k not in st.session_state:
-        st.session_state[k] = [] if k == "history" else None
+        st.session_state[k] = None
+# Stage 2 career log: running histograms + the latest career's packed bits (see eng.new_career_log)
+if st.session_state.history is None:
+    st.session_state.history = eng.new_career_log(N_CAREER)
 
 # --- 4. SIDEBAR ---
 with st.sidebar:
@@ -52,7 +61,8 @@ with st.sidebar:
     if st.button("Open Research Lab") or (current and (m_sel != current[0] or t_sel != current[1])):
         if not current or (m_sel != current[0] or t_sel != current[1]):
             st.session_state.cur_scen = (m_sel, t_sel)
-            st.session_state.audit, st.session_state.verified, st.session_state.history = None, False, []
+            st.session_state.audit, st.session_state.verified = None, False
+            st.session_state.history = eng.new_career_log(N_CAREER)
             st.rerun()
 
 # --- 5. MAIN INTERFACE ---
@@ -72,7 +82,7 @@ else:
     with t1:
         st.subheader("Probability Discovery")
         if st.button("Request Audit Report"):
-            st.session_state.audit = eng.run_audit(mkt, sec, p_true)
+            st.session_state.audit = eng.run_audit(mkt, sec, p_true, n=N_AUDIT)
             st.session_state.verified = False
         if st.session_state.audit:
             r = st.session_state.audit
@@ -92,19 +102,59 @@ else:
         else:
             p_val = st.session_state.audit['p_observed']
             st.info(f"**Research Goal:** Investigating failure streaks with a **{p_val:.3f}** success probability.")
-            if st.button("Simulate 100-Deal Career"):
-                st.session_state.history.append(eng.simulate_career(p_val))
-            if st.session_state.history:
-                lt = st.session_state.history[-1]
+            log = st.session_state.history
+            b_col1, b_col2 = st.columns(2)
+            if b_col1.button(f"Simulate {log['n_deals']}-Deal Career"):
+                eng.record_careers(log, eng.simulate_careers(p_val, 1, log['n_deals']))
+            if b_col2.button("Simulate 1,000 More Careers"):
+                eng.record_careers(log, eng.simulate_careers(p_val, 1000, log['n_deals']))
+            if log["count"]:
+                lt = eng.career_outcomes(log)
                 m_col1, m_col2 = st.columns(2)
-                m_col1.metric("Total Wins", f"{lt['Wins']}/100")
-                m_col2.metric("Max Consecutive Failures", f"{lt['Max_Streak']}")
+                m_col1.metric("Total Wins", f"{lt.sum()}/{log['n_deals']}")
+                m_col2.metric("Max Consecutive Failures", f"{eng.max_fail_streaks(lt[None, :])[0]}")
                 st.write("### Sequence of Outcomes")
-                st.write(" ".join(["🟩" if x else "🟥" for x in lt['raw']]))
+                st.write(" ".join(["🟩" if x else "🟥" for x in lt]))
+
+                # Cross-career view: everything the student has simulated in this scenario
+                st.write(f"### All {log['count']:,} Careers So Far")
+                win_hist, streak_hist = log["win_hist"], log["streak_hist"]
+                a_col1, a_col2, a_col3 = st.columns(3)
+                a_col1.metric("Average Wins", f"{np.arange(log['n_deals'] + 1) @ win_hist / log['count']:.1f}/{log['n_deals']}")
+                a_col2.metric("Wins (10th-90th pct)", f"{eng.hist_percentile(win_hist, 10)}-{eng.hist_percentile(win_hist, 90)}")
+                a_col3.metric("Worst Losing Streak Seen", f"{np.flatnonzero(streak_hist).max()}")
+
+                # The streak chart also marks the exact odds at the researched p (shared, precomputed table)
+                exact = truth.streaks(p_val, log['n_deals'])
+                h_col1, h_col2 = st.columns(2)
+                for col, hist, title, theory in [(h_col1, streak_hist, "Longest Losing Streak per Career", exact),
+                                                 (h_col2, win_hist, "Wins per Career", None)]:
+                    used = np.flatnonzero(hist)
+                    lo, hi = used.min(), used.max()
+                    hist_df = pd.DataFrame({"Value": np.arange(lo, hi + 1), "Share": hist[lo:hi + 1] / log["count"]})
+                    layers = [{
+                        "mark": {"type": "bar", "color": "#1C83E1", "tooltip": True},
+                        "encoding": {
+                            "x": {"field": "Value", "type": "ordinal", "title": ""},
+                            "y": {"field": "Share", "type": "quantitative", "axis": {"format": "%"}, "title": "Share of Careers"}
+                        }
+                    }]
+                    if theory is not None:
+                        hist_df["Exact"] = theory[lo:hi + 1]
+                        layers.append({
+                            "mark": {"type": "tick", "color": "#D32F2F", "thickness": 2, "tooltip": True},
+                            "encoding": {
+                                "x": {"field": "Value", "type": "ordinal"},
+                                "y": {"field": "Exact", "type": "quantitative"}
+                            }
+                        })
+                    col.vega_lite_chart(hist_df, {"title": title, "height": 220, "layer": layers},
+                                        use_container_width=True)
+                st.caption("Red ticks: exact probability of each longest streak at your researched p.")
 
     with t3:
         st.subheader("Stage 3: Sizing & Capital Deployment")
-        if not st.session_state.history: 
+        if not st.session_state.history["count"]: 
             st.warning("🔒 Complete Stage 2 to unlock capital deployment.")
         else:
             # 1. Setup context from previous stages
@@ -116,45 +166,119 @@ else:
                          help="What percentage of your current fund do you deploy into every single deal?")
             
             # 3. Execution - One Trial per Click
-            if st.button("🚀 Run 50-Deal Simulation"):
-                path = eng.run_simulation(f, p_val, b)
-                
+            if st.button(f"🚀 Run {N_WEALTH}-Deal Simulation"):
+                # Log-wealth never overflows, so a long horizon at a big multiple still plots;
+                # funds past $1e15 switch the chart and metrics to powers of ten
+                log_path = eng.run_simulation(f, p_val, b, n_steps=N_WEALTH, log_wealth=True)
+                l10 = log_path / np.log(10)
+                huge = l10.max() >= 15
+
+                def money(v):
+                    if v == -np.inf: return "$0.00"
+                    return f"${10 ** (v % 1):.2f}e+{int(v)}" if v >= 15 else f"${10 ** v:,.2f}"
+
                 st.write(f"#### Fund Journey (1 Trial)")
-                fig, ax = plt.subplots(figsize=(10, 4))
                 
                 # Visual threshold: Green if ending above start, Red if below
-                line_color = "#2ecc71" if path[-1] > 100 else "#e74c3c"
-                
-                # LINEAR PLOT (Visceral discovery of swings)
-                ax.plot(path, color=line_color, linewidth=2, label="Fund Value")
+                line_color = "#2ecc71" if l10[-1] > 2 else "#e74c3c"
                 
-                # THE $100 REFERENCE LINE
-                ax.axhline(100, color="gray", linestyle="--", alpha=0.6, label="Starting Capital ($100)")
-                
-                # Formatting
-                ax.set_ylabel("Wealth ($)")
-                ax.set_xlabel("Number of Deals")
-                ax.set_title(f"Final Value: ${path[-1]:,.2f}")
-                ax.grid(True, axis='y', alpha=0.2)
-                ax.legend()
-                
-                st.pyplot(fig)
-                plt.close(fig)
+                # LINEAR PLOT (Visceral discovery of swings) + THE $100 REFERENCE LINE
+                # Drawn in the browser with Vega-Lite, so no plotting library loads on the server
+                deals = np.arange(len(log_path))
+                if huge:
+                    journey_df = pd.DataFrame({"Deal": deals, "Wealth": l10})[np.isfinite(l10)]
+                else:
+                    journey_df = pd.DataFrame({"Deal": deals, "Wealth": np.exp(log_path)})  # insolvent = exactly $0
+                st.vega_lite_chart(journey_df, {
+                    "title": f"Final Value: {money(l10[-1])}",
+                    "height": 320,
+                    "layer": [
+                        {
+                            "mark": {"type": "line", "color": line_color, "strokeWidth": 2},
+                            "encoding": {
+                                "x": {"field": "Deal", "type": "quantitative", "title": "Number of Deals"},
+                                "y": {"field": "Wealth", "type": "quantitative",
+                                      "title": "Wealth (log10 $)" if huge else "Wealth ($)"}
+                            }
+                        },
+                        {
+                            "mark": {"type": "rule", "color": "gray", "strokeDash": [6, 4], "opacity": 0.6},
+                            "encoding": {"y": {"datum": 2 if huge else 100}}
+                        }
+                    ]
+                }, use_container_width=True)
 
                 # 4. Metrics for discovery of risk
                 c1, c2, c3 = st.columns(3)
-                c1.metric("Peak Wealth", f"${np.max(path):,.2f}")
-                c2.metric("Trough (Max Pain)", f"${np.min(path):,.2f}")
-                c3.metric("Final Result", f"${path[-1]:,.2f}")
+                c1.metric("Peak Wealth", money(l10.max()))
+                c2.metric("Trough (Max Pain)", money(l10.min()))
+                c3.metric("Final Result", money(l10[-1]))
                 
                 # 5. Pedagogical feedback
-                if path[-1] <= 1.0:
+                if l10[-1] <= 0:
                     st.error("💥 **INSOLVENT:** Your fund hit the floor. In this universe, your sizing was too aggressive for the sequence of outcomes.")
-                elif path[-1] < 100:
+                elif l10[-1] < 2:
                     st.warning("📉 **UNDERWATER:** You survived, but you finished with less than your starting capital.")
                 else:
                     st.success("💰 **SUCCESS:** Your deployment strategy resulted in net growth.")
 
+            # 6. Portfolio Mode: split every round across all sectors at once
+            st.divider()
+            st.markdown("#### 🧺 Portfolio Mode")
+            st.caption("Deploy into every sector each round. All sectors share the same market, so their wins and losses tend to cluster.")
+            sectors = list(nav.B_VALS.keys())
+            w_cols = st.columns(len(sectors))
+            weights = [w_cols[i].slider(f"{s} ({nav.B_VALS[s]}x)", 0.0, 1.0, 0.1 if s == sec else 0.0, 0.01, key=f"port_w_{i}")
+                       for i, s in enumerate(sectors)]
+            rho = st.slider("Market Correlation (ρ)", 0.0, 0.95, 0.3, 0.05,
+                            help="0 = sectors are independent. Near 1 = they all boom or bust together.")
+
+            if sum(weights) > 1.0:
+                st.error(f"Your allocations add up to {sum(weights):.0%} of the fund. Keep the total at or below 100%.")
+            elif st.button("🧺 Run 1,000 Portfolio Funds"):
+                # The market plays out with its true odds; the student only audited one sector
+                ps = [nav.P_MATRIX[mkt][s] for s in sectors]
+                paths = port.simulate_portfolios(weights, ps, [nav.B_VALS[s] for s in sectors], rho,
+                                                 n_funds=1000, n_steps=N_WEALTH, return_paths=True)
+                finals = paths[:, -1]
+                p1, p2, p3 = st.columns(3)
+                p1.metric("Median Fund", f"${np.median(finals):,.2f}")
+                p2.metric("Average Fund", f"${np.mean(finals):,.2f}")
+                p3.metric("Insolvent Funds", f"{np.mean(finals <= 1.0):.0%}")
+
+                band_df = pd.DataFrame({"Deal": np.arange(paths.shape[1]),
+                                        "Median": np.median(paths, axis=0),
+                                        "Low": np.percentile(paths, 10, axis=0),
+                                        "High": np.percentile(paths, 90, axis=0)})
+                st.vega_lite_chart(band_df, {
+                    "title": "Typical Fund (median, with 10th-90th percentile band)",
+                    "height": 320,
+                    "layer": [
+                        {
+                            "mark": {"type": "area", "opacity": 0.2, "color": "#1C83E1"},
+                            "encoding": {
+                                "x": {"field": "Deal", "type": "quantitative", "title": "Number of Deals"},
+                                "y": {"field": "Low", "type": "quantitative", "title": "Wealth ($)"},
+                                "y2": {"field": "High"}
+                            }
+                        },
+                        {
+                            "mark": {"type": "line", "color": "#1C83E1", "strokeWidth": 2},
+                            "encoding": {
+                                "x": {"field": "Deal", "type": "quantitative"},
+                                "y": {"field": "Median", "type": "quantitative"}
+                            }
+                        },
+                        {
+                            "mark": {"type": "rule", "color": "gray", "strokeDash": [6, 4], "opacity": 0.6},
+                            "encoding": {"y": {"datum": 100}}
+                        }
+                    ]
+                }, use_container_width=True)
+
+# Precompute this process's truth tables in the background once the page is on screen
+truth.warm(nav.P_MATRIX, nav.B_VALS, nav.HORIZONS)
+
 # --- FINAL PADDING FOR PEDAGOGICAL INTEGRITY ---
 # ............................................................................
 # ............................................................................
@@ -0,0 +1,86 @@
+"""
+Cold-start budget check for every page.
+
+Each page is rendered once in a brand-new Python process, so every import it
+pulls in is paid for. The report splits the Streamlit framework import (the
+same for every page) from the page's own import + first-render time, which is
+what the budgets below cap. Exits non-zero if any page is over budget.
+
+    python perf/cold_start.py
+    python perf/cold_start.py --repeat 5
+"""
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Seconds allowed for a page's own imports + first render, on top of Streamlit itself.
+BUDGETS = {
+    "Home.py": 0.15,
+    "pages/01_venue_lab.py": 0.25,
+    "pages/01_instructor_console.py": 0.25,
+    "pages/02_vc_training_lab.py": 0.25,
+    "pages/02_vc_instructor_desk.py": 0.25,
+}
+
+# Pages behind a login are measured past it, so the budget covers what the instructor sees.
+SESSION_STATE = {
+    "pages/01_instructor_console.py": {"authenticated": True},
+    # Logged in with a small roster, so the Truth Engine panel (cache and scheduler stats) renders too
+    "pages/02_vc_instructor_desk.py": {
+        "desk_password": "VC_LEADER",
+        "contestants": [{"Name": "Ann", "Sector": "Type 1: The Basics", "f": 0.1},
+                        {"Name": "Bo", "Sector": "Type 3: Big Science", "f": 0.3}],
+        "results_data": {"Ann": [], "Bo": []},
+        "sim_total_trials": 0,
+        "colors": {"Ann": "#FF4B4B", "Bo": "#1C83E1"},
+    },
+}
+
+_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import streamlit
+from streamlit.testing.v1 import AppTest
+HEAVY = ("matplotlib.pyplot", "altair", "scipy")
+before = {m for m in HEAVY if m in sys.modules}
+t1 = time.perf_counter()
+at = AppTest.from_file(sys.argv[1], default_timeout=60)
+for k, v in json.loads(sys.argv[2]).items():
+    at.session_state[k] = v
+at.run()
+t2 = time.perf_counter()
+heavy = [m for m in HEAVY if m in sys.modules and m not in before]
+print(json.dumps({"framework": t1 - t0, "page": t2 - t1, "errors": len(at.exception), "heavy": heavy}))
+"""
+
+def measure(page):
+    """Renders one page in a fresh interpreter and returns its timings."""
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE, str(ROOT / page), json.dumps(SESSION_STATE.get(page, {}))],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3, help="Cold starts per page; the fastest one counts.")
+    args = parser.parse_args(argv)
+
+    failures = 0
+    print(f"{'page':34} {'streamlit':>10} {'page':>8} {'budget':>8}  heavy imports")
+    for page, budget in BUDGETS.items():
+        runs = [measure(page) for _ in range(args.repeat)]
+        best = min(runs, key=lambda r: r["page"])
+        over = best["page"] > budget or best["errors"]
+        failures += bool(over)
+        flag = "  OVER BUDGET" if best["page"] > budget else ("  SCRIPT ERROR" if best["errors"] else "")
+        print(f"{page:34} {best['framework']:9.2f}s {best['page']:7.2f}s {budget:7.2f}s  "
+              f"{', '.join(best['heavy']) or '-'}{flag}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
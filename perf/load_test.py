@@ -0,0 +1,209 @@
+"""
+Concurrent-session load test for the lab pages.
+
+Spins up N simulated browser sessions with Streamlit's in-process AppTest,
+lets each one play a realistic click script at the same time, and reports
+rerun latency (p50/p95/p99), CPU time and per-session memory.
+
+    python perf/load_test.py --sessions 100
+    python perf/load_test.py --page vc --sessions 40 --rounds 3 --think 0.5
+"""
+import argparse
+import pickle
+import resource
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import numpy as np
+from streamlit import source_util
+from streamlit.runtime import Runtime
+from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+from streamlit.runtime.media_file_manager import MediaFileManager
+from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+from streamlit.runtime.scriptrunner import ScriptRunnerEvent
+from streamlit.testing.v1 import AppTest
+from streamlit.testing.v1.local_script_runner import LocalScriptRunner
+
+ROOT = Path(__file__).resolve().parent.parent
+
+PAGES = {
+    "venue": ROOT / "pages" / "01_venue_lab.py",
+    "vc": ROOT / "pages" / "02_vc_training_lab.py",
+}
+
+# --- 1. A SESSION THAT CAN SHARE THE PROCESS WITH OTHERS ---
+class ServerLikeScriptRunner(LocalScriptRunner):
+    """
+    The test runner keeps button triggers set after st.rerun() so tests can
+    inspect them, which makes every "click then rerun" button fire forever.
+    Reset them the way the real server does when a run stops for a rerun, and
+    drop the interrupted run's output just like the browser would.
+    """
+
+    def _on_script_finished(self, ctx, event, premature_stop):
+        if event == ScriptRunnerEvent.SCRIPT_STOPPED_FOR_RERUN and not premature_stop:
+            self._session_state.on_script_finished(ctx.widget_ids_this_run)
+            self.forward_msg_queue.clear()
+        super()._on_script_finished(ctx, event, premature_stop)
+
+class ConcurrentAppTest(AppTest):
+    """
+    AppTest installs and tears down a mock Runtime around every run, which
+    breaks as soon as two sessions rerun at once. Here the runtime is installed
+    once for the whole load test (see install_runtime) and left alone, so
+    sessions behave like tabs connected to one server process.
+    """
+
+    def _run(self, widget_state=None, timeout=None):
+        script_runner = ServerLikeScriptRunner(self._script_path, self.session_state)
+        self._tree = script_runner.run(widget_state, self.query_params, timeout or self.default_timeout)
+        self._tree._runner = self
+        return self
+
+def install_runtime():
+    """Installs one shared mock runtime; also drops the page list cached for the previous page."""
+    with source_util._pages_cache_lock:
+        source_util._cached_pages = None
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    Runtime._instance = runtime
+
+# --- 2. CLICK SCRIPTS ---
+class Session:
+    """One simulated student: an app instance plus a log of timed reruns."""
+
+    def __init__(self, page, rng, think):
+        self.at = ConcurrentAppTest(str(PAGES[page]), default_timeout=120)
+        self.rng = rng
+        self.think = think
+        self.latencies = []
+        self.errors = 0
+
+    def rerun(self, widget=None):
+        if self.think:
+            time.sleep(self.rng.uniform(0, self.think))
+        t0 = time.perf_counter()
+        (widget.run() if widget is not None else self.at.run())
+        self.latencies.append(time.perf_counter() - t0)
+        self.errors += len(self.at.exception)
+
+    def click(self, label):
+        """Clicks the first button whose label contains `label`; no-op if it isn't shown."""
+        for b in self.at.button:
+            if label in b.label and not b.disabled:
+                self.rerun(b.click())
+                return True
+        return False
+
+    def state_bytes(self):
+        total = 0
+        for v in self.at.session_state.filtered_state.values():
+            try:
+                total += len(pickle.dumps(v))
+            except Exception:
+                pass
+        return total
+
+def venue_lab_script(s):
+    """Set a cutoff, peek at a few venues, then finish the race and start over."""
+    s.rerun()
+    s.rerun(s.at.sidebar.slider[0].set_value(int(s.rng.integers(1, 60))))
+    for _ in range(int(s.rng.integers(3, 10))):
+        s.click("Reveal Next Venue")
+    s.click("Jump to Search")
+    if s.rng.random() < 0.5:
+        s.click("Leap to Result")
+    else:
+        s.click("Auto-Play Reveal")
+        s.click("Show Full Result")
+    s.click("Reset Lab") or s.click("Restart Class Race")
+
+def vc_lab_script(s):
+    """Open a scenario, pass the audit, stress test a few careers and size a few runs."""
+    s.rerun()
+    boxes = s.at.sidebar.selectbox
+    s.rerun(boxes[0].select(s.rng.choice(boxes[0].options)))
+    s.rerun(s.at.sidebar.selectbox[1].select(s.rng.choice(s.at.sidebar.selectbox[1].options)))
+    s.click("Open Research Lab")
+    s.click("Request Audit Report")
+    audit = s.at.session_state["audit"]
+    if audit:
+        s.rerun(s.at.number_input[0].set_value(audit["p_observed"]))
+        s.click("Verify Audit")
+    for _ in range(int(s.rng.integers(2, 6))):
+        s.click("-Deal Career")
+    if s.at.slider:
+        s.rerun(s.at.slider[0].set_value(round(float(s.rng.uniform(0.01, 0.6)), 2)))
+    for _ in range(int(s.rng.integers(2, 6))):
+        s.click("-Deal Simulation")
+
+SCRIPTS = {"venue": venue_lab_script, "vc": vc_lab_script}
+
+# --- 3. DRIVER ---
+def run_load(page, n_sessions, rounds=1, think=0.0, seed=0):
+    install_runtime()
+    sessions = [Session(page, np.random.default_rng(seed + i), think) for i in range(n_sessions)]
+    start = threading.Barrier(n_sessions)
+
+    def play(s):
+        start.wait()
+        for _ in range(rounds):
+            SCRIPTS[page](s)
+
+    rss0 = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    cpu0, wall0 = time.process_time(), time.perf_counter()
+    with ThreadPoolExecutor(max_workers=n_sessions) as pool:
+        list(pool.map(play, sessions))
+    cpu, wall = time.process_time() - cpu0, time.perf_counter() - wall0
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    lat = np.array([x for s in sessions for x in s.latencies]) * 1000
+    state = np.array([s.state_bytes() for s in sessions])
+    return {
+        "page": page,
+        "sessions": n_sessions,
+        "reruns": lat.size,
+        "errors": sum(s.errors for s in sessions),
+        "p50_ms": np.percentile(lat, 50),
+        "p95_ms": np.percentile(lat, 95),
+        "p99_ms": np.percentile(lat, 99),
+        "wall_s": wall,
+        "cpu_s": cpu,
+        "cpu_ms_per_rerun": cpu * 1000 / max(lat.size, 1),
+        "state_kb_per_session": state.mean() / 1024,
+        # ru_maxrss is KiB on Linux; peak growth spread across the sessions
+        "rss_kb_per_session": (rss - rss0) / n_sessions,
+    }
+
+def print_report(r):
+    print(f"\n=== {r['page']} lab: {r['sessions']} concurrent sessions, {r['reruns']} reruns ===")
+    print(f"rerun latency   p50 {r['p50_ms']:8.1f} ms | p95 {r['p95_ms']:8.1f} ms | p99 {r['p99_ms']:8.1f} ms")
+    print(f"cpu time        {r['cpu_s']:8.2f} s total | {r['cpu_ms_per_rerun']:.1f} ms per rerun | wall {r['wall_s']:.2f} s")
+    print(f"memory/session  {r['state_kb_per_session']:8.1f} KB session state | {r['rss_kb_per_session']:.0f} KB peak RSS growth")
+    if r["errors"]:
+        print(f"!! {r['errors']} script exceptions raised during the run")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--page", choices=["venue", "vc", "all"], default="all")
+    parser.add_argument("--sessions", type=int, default=30, help="Concurrent sessions to simulate.")
+    parser.add_argument("--rounds", type=int, default=1, help="Times each session repeats its click script.")
+    parser.add_argument("--think", type=float, default=0.0, help="Max random pause (s) before each click.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    pages = ["venue", "vc"] if args.page == "all" else [args.page]
+    errors = 0
+    for page in pages:
+        r = run_load(page, args.sessions, args.rounds, args.think, args.seed)
+        print_report(r)
+        errors += r["errors"]
+    return 1 if errors else 0
+
+if __name__ == "__main__":
+    sys.exit(main())